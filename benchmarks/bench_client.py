@@ -0,0 +1,164 @@
+"""
+QL 客户端性能基准, 基于本地的 MockQLServer, 不需要真实面板
+
+python benchmarks/bench_client.py
+python benchmarks/bench_client.py --latency 0.002 --json > bench.json
+python benchmarks/bench_client.py --baseline bench.json --tolerance 0.2   # 比基准慢 20% 以上时返回非 0
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qinglong_sdk import QL  # noqa: E402
+from qinglong_sdk.log_archive import iter_log_files  # noqa: E402
+from qinglong_sdk.mock_server import CLIENT_ID, CLIENT_SECRET  # noqa: E402
+
+
+def measure(name: str, func, calls: int, threads: int = 1) -> dict:
+    """
+    执行 func calls 次, 返回 calls/s、p50/p99 耗时, 再单独执行一次统计内存峰值
+    """
+    latencies = []
+
+    def timed(_):
+        start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    if threads > 1:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(timed, range(calls)))
+    else:
+        for i in range(calls):
+            timed(i)
+    elapsed = time.perf_counter() - start
+
+    # tracemalloc 会明显拖慢执行, 不能与计时同时进行
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        'name': name,
+        'calls': calls,
+        'calls_per_sec': calls / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p99_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        'peak_kb': peak / 1024,
+    }
+
+
+def start_server(args) -> tuple[subprocess.Popen, str]:
+    """
+    在子进程中运行 MockQLServer, 避免与客户端争抢 GIL 或被计入内存
+    """
+    cmd = [sys.executable, '-m', 'qinglong_sdk.mock_server', '--port', '0',
+           '--latency', str(args.latency), '--error-rate', str(args.error_rate), '--run-time', '0.05',
+           '--seed-crons', str(args.crons), '--seed-envs', str(args.envs), '--seed-logs', str(args.logs)]
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True, env=env)
+    url = process.stdout.readline().split()[0]
+    return process, url
+
+
+def run(args) -> list[dict]:
+    results = []
+    process, url = start_server(args)
+    try:
+        with QL(url, CLIENT_ID, CLIENT_SECRET, pool_maxsize=args.threads) as ql:
+            ql.crons_get_views()
+            cron_ids = [cron['id'] for cron in ql.crons_get_all()['data']]
+
+            # list
+            results.append(measure('crons_get_all', ql.crons_get_all, args.repeat))
+            results.append(measure('env_get', ql.env_get, args.repeat))
+            results.append(measure('iter_crons(page_size=100)', lambda: sum(1 for _ in ql.iter_crons()), args.repeat))
+            results.append(measure('crons_get_all(filters)', lambda: ql.crons_get_all(
+                filters=[['labels', 'In', ['group1']]]), args.repeat))
+
+            # detail
+            results.append(measure('crons_get_task_detail', lambda: ql.crons_get_task_detail(cron_ids[0]),
+                                   args.repeat * 10))
+            results.append(measure(f'crons_get_task_detail x{args.threads} threads',
+                                   lambda: ql.crons_get_task_detail(cron_ids[0]), args.repeat * 10, args.threads))
+
+            # bulk mutation
+            desired = [{'name': f'BENCH_{i}', 'value': str(i)} for i in range(500)]
+            results.append(measure('env_sync(500)', lambda: ql.env_sync(desired), 1))
+            results.append(measure('env_sync(500) unchanged', lambda: ql.env_sync(desired), args.repeat))
+            spec = [{'command': cron['command'], 'schedule': cron['schedule'], 'name': cron['name']}
+                    for cron in ql.crons_get_all()['data']]
+            results.append(measure('crons_apply unchanged', lambda: ql.crons_apply(spec), args.repeat))
+            results.append(measure('crons_run_and_wait(20)',
+                                   lambda: ql.crons_run_and_wait(cron_ids[:20], min_interval=0.02), 1))
+
+            # logs
+            with tempfile.TemporaryDirectory() as dest:
+                results.append(measure('logs_sync full', lambda: ql.logs_sync(dest), 1))
+                results.append(measure('logs_sync incremental', lambda: ql.logs_sync(dest), args.repeat))
+            directory, filename, _ = next(iter_log_files(ql.logs_get_all()))
+            results.append(measure('logs_get_detail', lambda: ql.logs_get_detail(directory, filename),
+                                   args.repeat * 10))
+    finally:
+        process.terminate()
+        process.wait()
+    return results
+
+
+def compare(results: list[dict], baseline_path: str, tolerance: float) -> list[str]:
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {item['name']: item for item in json.load(f)}
+    regressions = []
+    for item in results:
+        base = baseline.get(item['name'])
+        if base and item['calls_per_sec'] < base['calls_per_sec'] * (1 - tolerance):
+            regressions.append(f"{item['name']}: {item['calls_per_sec']:.1f} calls/s, "
+                               f"基准 {base['calls_per_sec']:.1f} calls/s")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='QL 客户端性能基准')
+    parser.add_argument('--crons', type=int, default=2000)
+    parser.add_argument('--envs', type=int, default=500)
+    parser.add_argument('--logs', type=int, default=5, help='每个任务的日志文件数')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0, help='模拟的服务端延迟(秒)')
+    parser.add_argument('--error-rate', type=float, default=0)
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    parser.add_argument('--baseline', help='与之前 --json 输出的结果比较')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'workload':<40}{'calls':>8}{'calls/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'peak KB':>12}")
+        for item in results:
+            print(f"{item['name']:<40}{item['calls']:>8}{item['calls_per_sec']:>12.1f}"
+                  f"{item['p50_ms']:>10.2f}{item['p99_ms']:>10.2f}{item['peak_kb']:>12.0f}")
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for line in regressions:
+            print(f"性能下降: {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
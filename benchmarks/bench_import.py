@@ -0,0 +1,71 @@
+"""
+import qinglong_sdk 的启动耗时基准, 每次都在新的子进程中执行
+
+python benchmarks/bench_import.py
+python benchmarks/bench_import.py --budget 80   # 中位数超过 80ms 或加载了重依赖时返回非 0
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# import 和创建 QL 时都不应加载这些模块
+HEAVY_MODULES = ('requests', 'urllib3', 'loguru', 'dotenv', 'aiohttp', 'sqlite3', 'concurrent.futures', 'gzip')
+
+SCRIPT = f"""
+import json, sys, time
+start = time.perf_counter()
+import qinglong_sdk
+from qinglong_sdk import QL
+QL.from_env(dotenv=False)
+elapsed = time.perf_counter() - start
+print(json.dumps({{'elapsed': elapsed, 'loaded': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def measure_once() -> dict:
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    out = subprocess.run([sys.executable, '-c', SCRIPT], capture_output=True, text=True, env=env, check=True)
+    return json.loads(out.stdout)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='qinglong_sdk 导入耗时基准')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--budget', type=float, default=None, help='中位数耗时上限(毫秒)')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    args = parser.parse_args()
+
+    # 先执行一次, 生成 .pyc
+    measure_once()
+    runs = [measure_once() for _ in range(args.repeat)]
+    times = sorted(run['elapsed'] * 1000 for run in runs)
+    loaded = sorted({name for run in runs for name in run['loaded']})
+    result = {
+        'repeat': args.repeat,
+        'median_ms': statistics.median(times),
+        'min_ms': times[0],
+        'max_ms': times[-1],
+        'heavy_modules': loaded,
+    }
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"import qinglong_sdk + QL.from_env(): 中位数 {result['median_ms']:.1f}ms, "
+              f"最小 {result['min_ms']:.1f}ms, 最大 {result['max_ms']:.1f}ms")
+        if loaded:
+            print(f"加载了重依赖: {', '.join(loaded)}")
+
+    failed = bool(loaded)
+    if args.budget is not None and result['median_ms'] > args.budget:
+        print(f"导入耗时超出预算: {result['median_ms']:.1f}ms > {args.budget:.1f}ms", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
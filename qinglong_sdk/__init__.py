@@ -1,3 +1,65 @@
-from qinglong_sdk.ql_sdk import QL
+import importlib
+from typing import TYPE_CHECKING
 
-__all__ = ['QL']
+# 按需导入, import qinglong_sdk 时不加载 requests/aiohttp/sqlite3 等依赖
+_EXPORTS = {
+    'QL': 'qinglong_sdk.ql_sdk',
+    'AsyncQL': 'qinglong_sdk.ql_async',
+    'QLFleet': 'qinglong_sdk.ql_fleet',
+    'FleetResult': 'qinglong_sdk.ql_fleet',
+    'ResponseCache': 'qinglong_sdk.response_cache',
+    'TokenCache': 'qinglong_sdk.token_cache',
+    'Cron': 'qinglong_sdk.models',
+    'Env': 'qinglong_sdk.models',
+    'Subscription': 'qinglong_sdk.models',
+    'CronView': 'qinglong_sdk.models',
+    'LogEntry': 'qinglong_sdk.models',
+    'LogIndex': 'qinglong_sdk.log_index',
+    'ConfigSession': 'qinglong_sdk.config_edit',
+    'CronExpr': 'qinglong_sdk.cron_schedule',
+    'CronDAG': 'qinglong_sdk.dag',
+    'Watcher': 'qinglong_sdk.watch',
+    'WatchEvent': 'qinglong_sdk.watch',
+    'Metrics': 'qinglong_sdk.metrics',
+    'RateLimiter': 'qinglong_sdk.policy',
+    'RetryPolicy': 'qinglong_sdk.policy',
+    'CircuitBreaker': 'qinglong_sdk.policy',
+    'QLError': 'qinglong_sdk.exceptions',
+    'QLHTTPError': 'qinglong_sdk.exceptions',
+    'QLAuthError': 'qinglong_sdk.exceptions',
+    'QLConnectionError': 'qinglong_sdk.exceptions',
+    'QLCircuitOpenError': 'qinglong_sdk.exceptions',
+    'QLConflictError': 'qinglong_sdk.exceptions',
+}
+
+__all__ = list(_EXPORTS)
+
+if TYPE_CHECKING:
+    from qinglong_sdk.ql_sdk import QL
+    from qinglong_sdk.ql_async import AsyncQL
+    from qinglong_sdk.ql_fleet import QLFleet, FleetResult
+    from qinglong_sdk.exceptions import (QLError, QLHTTPError, QLAuthError, QLConnectionError, QLCircuitOpenError,
+                                         QLConflictError)
+    from qinglong_sdk.config_edit import ConfigSession
+    from qinglong_sdk.cron_schedule import CronExpr
+    from qinglong_sdk.dag import CronDAG
+    from qinglong_sdk.watch import Watcher, WatchEvent
+    from qinglong_sdk.log_index import LogIndex
+    from qinglong_sdk.metrics import Metrics
+    from qinglong_sdk.models import Cron, Env, Subscription, CronView, LogEntry
+    from qinglong_sdk.policy import RateLimiter, RetryPolicy, CircuitBreaker
+    from qinglong_sdk.response_cache import ResponseCache
+    from qinglong_sdk.token_cache import TokenCache
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'qinglong_sdk' has no attribute '{name}'")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,291 @@
+"""
+qlctl: 青龙面板命令行工具, 从环境变量(或 .env)读取 QL_URL / QL_CLIENT_ID / QL_CLIENT_SECRET
+
+qlctl crons --search jd_ > crons.jsonl
+qlctl envs | jq -r .name
+qlctl log 12 --follow
+jq -c '{op: "crons_run", args: [.id]}' crons.jsonl | qlctl exec --workers 16 --batch 200
+"""
+import argparse
+import inspect
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from qinglong_sdk.ql_sdk import QL, _data_list
+
+# 接受 id 列表的操作: {操作: 参数名}, 连续的同类操作会合并为一次请求
+BATCH_OPS = {
+    'crons_run': 'cron_id',
+    'crons_stop': 'cron_id',
+    'crons_delete': 'cron_id',
+    'crons_enable': 'ids',
+    'crons_disable': 'ids',
+    'env_enable': 'ids',
+    'env_disable': 'ids',
+    'env_delete': 'ids',
+    'subs_run': 'sub_id',
+    'subs_stop': 'sub_id',
+    'subs_enable': 'sub_id',
+    'subs_disable': 'sub_id',
+    'subs_delete': 'sub_id',
+}
+# 表示 id 的参数名, 操作同一资源同一 id 的行按输入顺序执行
+_ID_PARAMS = ('_id', 'ids', 'cron_id', 'sub_id', 'view_ids')
+# 不能通过 exec 调用的方法
+_DENIED = {'close', 'login', 'test', 'watch', 'from_env', 'session', 'invalidate', 'stats'}
+
+
+def _default(obj):
+    if hasattr(obj, 'to_dict'):
+        return obj.to_dict()
+    if hasattr(obj, '__next__'):
+        return list(obj)
+    return str(obj)
+
+
+def _write(obj, out=sys.stdout, flush: bool = False) -> None:
+    out.write(json.dumps(obj, ensure_ascii=False, default=_default) + '\n')
+    if flush:
+        out.flush()
+
+
+def _batch_ids(op: str, args) -> list | None:
+    """
+    只传了 id(或 id 列表)的批量操作, 返回 id 列表, 否则返回 None
+    """
+    param = BATCH_OPS.get(op)
+    if param is None:
+        return None
+    if isinstance(args, list) and len(args) == 1:
+        value = args[0]
+    elif isinstance(args, dict) and list(args) == [param]:
+        value = args[param]
+    else:
+        return None
+    return value if isinstance(value, list) else [value]
+
+
+def _op_keys(op: str, args) -> set:
+    """
+    操作涉及的 {(资源, id)}, 资源取方法名的前缀(crons / env / subs), 视图单独计算
+    参数无法识别时返回空集合
+    """
+    method = getattr(QL, op, None)
+    if not callable(method):
+        return set()
+    try:
+        if isinstance(args, dict):
+            bound = inspect.signature(method).bind_partial(None, **args)
+        else:
+            bound = inspect.signature(method).bind_partial(None, *(args or []))
+    except TypeError:
+        return set()
+    keys = set()
+    for param in _ID_PARAMS:
+        value = bound.arguments.get(param)
+        resource = 'views' if param == 'view_ids' else op.split('_', 1)[0]
+        for _id in value if isinstance(value, list) else [value]:
+            if isinstance(_id, (int, str)):
+                keys.add((resource, _id))
+    return keys
+
+
+def _call(ql: QL, op: str, args):
+    if op.startswith('_') or op in _DENIED or not callable(getattr(QL, op, None)):
+        raise ValueError(f"不支持的操作: {op}")
+    method = getattr(ql, op)
+    if isinstance(args, dict):
+        rt = method(**args)
+    else:
+        rt = method(*(args or []))
+    if hasattr(rt, '__next__'):
+        rt = list(rt)
+    return rt
+
+
+def execute(ql: QL, lines, workers: int = 8, batch_size: int = 100, out=sys.stdout, ordered: bool = False) -> int:
+    """
+    执行 JSON Lines 格式的操作, 每行 {"op": "env_update", "args": {...}} 或 {"op": "crons_run", "args": [1]}
+    每行输出一条结果 {"line": 行号, "op": ..., "ok": true, "result": ...} 或 {"line", "op", "ok": false, "error"}
+    操作并行执行, 结果按完成顺序输出; 连续的只带 id 的批量操作(见 BATCH_OPS)合并为一次请求, 最多 batch_size 个 id
+    操作同一资源同一 id 的行(例如先 crons_disable [1] 再 crons_enable [1])会等前面的行完成后再执行,
+    没有 id 参数的操作(例如 crons_apply)不参与排序; ordered=True 时所有行都按顺序逐个执行
+    返回失败的行数
+    """
+    failed = 0
+    # future: (行号, 操作, 合并的行数, 涉及的 (资源, id))
+    pending = {}
+    batch = {'op': None, 'ids': [], 'lines': []}
+
+    def report(line_nos, op, rt=None, error=None, size=1):
+        nonlocal failed
+        for line_no in line_nos:
+            result = {'line': line_no, 'op': op, 'ok': error is None}
+            if error is None:
+                result['result'] = rt
+            else:
+                result['error'] = f"{type(error).__name__}: {error}"
+                failed += 1
+            if size > 1:
+                result['batch'] = size
+            _write(result, out, flush=True)
+
+    def collect(done):
+        for future in done:
+            line_nos, op, size, _ = pending.pop(future)
+            try:
+                report(line_nos, op, future.result(), size=size)
+            except Exception as e:
+                report(line_nos, op, error=e, size=size)
+
+    def drain(limit):
+        while len(pending) > limit:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            collect(done)
+
+    def submit(line_nos, op, args):
+        keys = _op_keys(op, args)
+        if ordered:
+            drain(0)
+        else:
+            conflicts = [future for future, item in pending.items() if item[3] & keys]
+            if conflicts:
+                collect(wait(conflicts)[0])
+        pending[executor.submit(_call, ql, op, args)] = (line_nos, op, len(line_nos), keys)
+
+    def flush_batch():
+        if batch['ids']:
+            submit(batch['lines'], batch['op'], [batch['ids']])
+        batch.update(op=None, ids=[], lines=[])
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for line_no, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+                op = record['op']
+                args = record.get('args')
+            except (ValueError, KeyError, TypeError) as e:
+                report([line_no], None, error=e)
+                continue
+
+            ids = _batch_ids(op, args)
+            if ids is not None:
+                if batch['op'] != op or len(batch['ids']) + len(ids) > batch_size:
+                    flush_batch()
+                batch['op'] = op
+                batch['ids'].extend(ids)
+                batch['lines'].append(line_no)
+            else:
+                flush_batch()
+                submit([line_no], op, args)
+            drain(workers * 2)
+        flush_batch()
+        drain(0)
+    return failed
+
+
+def _client(args) -> QL:
+    kwargs = {'pool_maxsize': max(10, args.workers), 'timeout': args.timeout}
+    if not (args.url or args.client_id or args.client_secret):
+        return QL.from_env(**kwargs)
+    return QL(args.url or os.getenv('QL_URL', 'http://127.0.0.1:5700'),
+              args.client_id or os.getenv('QL_CLIENT_ID'),
+              args.client_secret or os.getenv('QL_CLIENT_SECRET'), **kwargs)
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='qlctl', description='青龙面板命令行工具, 输入输出均为 JSON Lines')
+    parser.add_argument('--url', help='面板地址, 默认读取 QL_URL')
+    parser.add_argument('--client-id', help='默认读取 QL_CLIENT_ID')
+    parser.add_argument('--client-secret', help='默认读取 QL_CLIENT_SECRET')
+    parser.add_argument('--workers', type=int, default=8, help='并发请求数')
+    parser.add_argument('--timeout', type=float, default=30)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('exec', help='从标准输入读取操作并执行')
+    command.add_argument('--batch', type=int, default=100, help='批量操作每次请求最多包含的 id 数')
+    command.add_argument('--ordered', action='store_true', help='按输入顺序逐个执行, 结果也按输入顺序输出')
+    command.add_argument('file', nargs='?', help='操作文件, 默认读取标准输入')
+
+    command = commands.add_parser('crons', help='列出定时任务')
+    command.add_argument('--search')
+    command.add_argument('--view-id', type=int)
+    command.add_argument('--page-size', type=int, default=200)
+
+    command = commands.add_parser('envs', help='列出环境变量')
+    command.add_argument('--search')
+
+    commands.add_parser('subs', help='列出订阅')
+    commands.add_parser('views', help='列出视图')
+
+    command = commands.add_parser('configs', help='列出配置文件, 指定文件名时输出文件内容')
+    command.add_argument('name', nargs='?')
+
+    commands.add_parser('logs', help='列出日志文件')
+
+    command = commands.add_parser('log', help='输出任务日志')
+    command.add_argument('cron_id', type=int)
+    command.add_argument('--follow', '-f', action='store_true', help='持续输出新增的日志, 任务结束后退出')
+    return parser
+
+
+def main(argv: list[str] = None) -> int:
+    args = _parser().parse_args(argv)
+    ql = _client(args)
+    out = sys.stdout
+    try:
+        if args.command == 'exec':
+            if args.file:
+                with open(args.file, encoding='utf-8') as f:
+                    failed = execute(ql, f, args.workers, args.batch, out, args.ordered)
+            else:
+                failed = execute(ql, sys.stdin, args.workers, args.batch, out, args.ordered)
+            return 1 if failed else 0
+        if args.command == 'crons':
+            if args.view_id is not None:
+                items = _data_list(ql.crons_get_all(search_value=args.search, view_id=args.view_id, raw=True))
+            else:
+                items = ql.iter_crons(page_size=args.page_size, search_value=args.search, raw=True)
+            for item in items:
+                _write(item, out)
+        elif args.command == 'envs':
+            for item in ql.iter_envs(search_value=args.search, raw=True):
+                _write(item, out)
+        elif args.command in ('subs', 'views'):
+            rt = ql.subs_get_all(raw=True) if args.command == 'subs' else ql.crons_get_views(raw=True)
+            for item in _data_list(rt):
+                _write(item, out)
+        elif args.command == 'configs':
+            if args.name:
+                out.write(ql.cfg_get_detail(args.name) or '')
+            else:
+                for item in _data_list(ql.cfg_get_all()):
+                    _write(item, out)
+        elif args.command == 'logs':
+            from qinglong_sdk.log_archive import iter_log_files
+
+            for directory, filename, _ in iter_log_files(ql.logs_get_all()):
+                _write({'directory': directory, 'filename': filename}, out)
+        elif args.command == 'log':
+            if args.follow:
+                for line in ql.crons_tail_log(args.cron_id):
+                    out.write(line + '\n')
+                    out.flush()
+            else:
+                out.write(ql.crons_get_log(args.cron_id) or '')
+        return 0
+    except BrokenPipeError:
+        # 例如 qlctl crons | head, 避免退出时再次写入已关闭的管道
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    finally:
+        ql.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
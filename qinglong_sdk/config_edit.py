@@ -0,0 +1,256 @@
+import hashlib
+import re
+
+from qinglong_sdk.exceptions import QLConflictError
+
+_EXPORT_LINE = re.compile(r'^\s*export\s+([A-Za-z_][A-Za-z0-9_]*)=(.*?)\s*$')
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def quote(value: str) -> str:
+    """
+    按 shell 双引号规则转义
+    """
+    for char in ('\\', '"', '$', '`'):
+        value = value.replace(char, '\\' + char)
+    return f'"{value}"'
+
+
+def unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == "'":
+        return value[1:-1]
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return re.sub(r'\\([\\"$`])', r'\1', value[1:-1])
+    return value
+
+
+def split_comment(value: str) -> tuple[str, str]:
+    """
+    分开值和行尾注释: '"1" # note' -> ('"1"', ' # note'), 引号内的 # 不算注释
+    """
+    quote_char = None
+    i = 0
+    while i < len(value):
+        char = value[i]
+        if quote_char:
+            if char == '\\' and quote_char == '"':
+                i += 1
+            elif char == quote_char:
+                quote_char = None
+        elif char in '"\'':
+            quote_char = char
+        elif char == '#' and i > 0 and value[i - 1] in ' \t':
+            start = len(value[:i].rstrip(' \t'))
+            return value[:start], value[start:]
+        i += 1
+    return value, ''
+
+
+def _split_lines(content: str) -> tuple[list[str], list[str]]:
+    """
+    返回 (各行内容, 各行的换行符), 保留 \r\n, 最后一行没有换行符时为 ''
+    """
+    lines, endings = [], []
+    parts = content.split('\n')
+    for part in parts[:-1]:
+        if part.endswith('\r'):
+            lines.append(part[:-1])
+            endings.append('\r\n')
+        else:
+            lines.append(part)
+            endings.append('\n')
+    if parts[-1]:
+        lines.append(parts[-1])
+        endings.append('')
+    return lines, endings
+
+
+def parse_exports(content: str) -> dict:
+    """
+    返回 {KEY: 原始值}, 同名变量以最后一行为准
+    """
+    exports = {}
+    for line in content.splitlines():
+        match = _EXPORT_LINE.match(line)
+        if match:
+            exports[match.group(1)] = match.group(2)
+    return exports
+
+
+class ConfigSession:
+    """
+    配置文件编辑会话: 只获取一次文件内容, 在本地按 key 修改 export KEY=... 行,
+    内容没有变化时不保存, 保存前重新获取文件检查是否被其他人修改过
+
+    with ql.cfg_edit('config.sh') as cfg:
+        cfg.set('TZ', 'Asia/Shanghai')
+        cfg.unset('OLD_KEY')
+    """
+
+    def __init__(self, ql, config_name: str, content: str = None) -> None:
+        """
+        content: 已经获取到的文件内容, 为空时调用 cfg_get_detail 获取
+        """
+        self.ql = ql
+        self.config_name = config_name
+        if content is None:
+            content = self._fetch(fresh=False)
+        self._reset(content)
+
+    def _fetch(self, fresh: bool = True) -> str:
+        if fresh and hasattr(self.ql, 'invalidate'):
+            self.ql.invalidate('/open/configs')
+        return self.ql.cfg_get_detail(self.config_name) or ''
+
+    def _reset(self, content: str) -> None:
+        self.base = content
+        self.base_hash = content_hash(content)
+        # 按原来的换行符写回, 新增的行使用文件中第一个换行符
+        self._lines, self._endings = _split_lines(content)
+        self._newline = '\r\n' if self._endings and self._endings[0] == '\r\n' else '\n'
+        self._index = {}
+        for i, line in enumerate(self._lines):
+            match = _EXPORT_LINE.match(line)
+            if match:
+                self._index.setdefault(match.group(1), []).append(i)
+        self._edits = {}
+
+    @property
+    def content(self) -> str:
+        return ''.join(line + ending for line, ending in zip(self._lines, self._endings) if line is not None)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self._edits) and self.content != self.base
+
+    def _raw_value(self, key: str) -> tuple[str, str] | None:
+        """
+        最后一个 export KEY=... 行的 (原始值, 行尾注释)
+        """
+        lines = self._index.get(key)
+        if not lines:
+            return None
+        return split_comment(_EXPORT_LINE.match(self._lines[lines[-1]]).group(2))
+
+    def get(self, key: str, default: str = None) -> str | None:
+        raw = self._raw_value(key)
+        if raw is None:
+            return default
+        return unquote(raw[0])
+
+    def set(self, key: str, value: str, raw: bool = False) -> None:
+        """
+        修改最后一个 export KEY=... 行(它才是生效的那一行), 保留行尾注释, 不存在时追加到文件末尾
+        raw=True 时 value 原样写入, 不加引号, 例如 '"$HOME/bin:$PATH"'
+        值没有变化时什么也不做
+        """
+        current = self._raw_value(key)
+        if current is not None and (current[0] == value if raw else unquote(current[0]) == value):
+            return
+        line = f"export {key}={value if raw else quote(value)}"
+        lines = self._index.get(key)
+        if lines:
+            self._lines[lines[-1]] = line + current[1]
+        else:
+            if self._endings and not self._endings[-1]:
+                self._endings[-1] = self._newline
+                ending = ''
+            else:
+                ending = self._newline
+            self._index[key] = [len(self._lines)]
+            self._lines.append(line)
+            self._endings.append(ending)
+        self._edits[key] = (value, raw)
+
+    def unset(self, key: str) -> None:
+        """
+        删除所有 export KEY=... 行
+        """
+        for i in self._index.pop(key, []):
+            self._lines[i] = None
+        self._edits[key] = None
+
+    def update(self, edits: dict) -> None:
+        """
+        edits: {KEY: value}, value 为 None 时删除
+        """
+        for key, value in edits.items():
+            if value is None:
+                self.unset(key)
+            else:
+                self.set(key, value)
+
+    def _replay(self, edits: dict) -> None:
+        for key, edit in edits.items():
+            if edit is None:
+                self.unset(key)
+            else:
+                self.set(key, *edit)
+
+    def save(self, force: bool = False, rebase: bool = True) -> bool:
+        """
+        保存修改, 内容没有变化时不发送请求, 返回是否保存
+        保存前重新获取文件, 如果已被其他人修改:
+          rebase=True 且修改的 key 在面板上都没有变化时, 把本次修改应用到新内容上再保存
+          否则抛出 QLConflictError
+        force=True 时不检查, 直接覆盖
+        青龙没有条件写入接口, 检查与保存之间仍有很短的时间窗口
+        """
+        if not self.changed:
+            return False
+        if not force:
+            remote = self._fetch()
+            if content_hash(remote) != self.base_hash:
+                before, after = parse_exports(self.base), parse_exports(remote)
+                touched = [key for key in self._edits if before.get(key) != after.get(key)]
+                if not rebase or touched:
+                    raise QLConflictError(f"配置文件已被修改: {self.config_name} {', '.join(touched)}".rstrip(),
+                                          'POST', '/open/configs/save')
+                edits = self._edits
+                self._reset(remote)
+                self._replay(edits)
+                if not self.changed:
+                    return False
+        content = self.content
+        self.ql.cfg_save(self.config_name, content)
+        self._reset(content)
+        return True
+
+    def discard(self) -> None:
+        self._reset(self.base)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.save()
+
+
+def apply_config_edits(ql, edits: dict, config_names: list[str], max_workers: int = 8,
+                       dry_run: bool = False) -> dict:
+    """
+    在线程池中把相同的 edits 应用到多个配置文件
+    返回 {'saved': [...], 'unchanged': [...], 'failed': {文件: 异常}}
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    def apply(config_name):
+        session = ConfigSession(ql, config_name)
+        session.update(edits)
+        if dry_run:
+            return session.changed
+        return session.save()
+
+    report = {'saved': [], 'unchanged': [], 'failed': {}}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(config_names)))) as executor:
+        futures = {name: executor.submit(apply, name) for name in config_names}
+        for name, future in futures.items():
+            try:
+                report['saved' if future.result() else 'unchanged'].append(name)
+            except Exception as e:
+                report['failed'][name] = e
+    return report
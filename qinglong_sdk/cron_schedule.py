@@ -0,0 +1,296 @@
+import datetime
+from collections import Counter
+from functools import lru_cache
+
+# 秒 分 时 日 月 周
+_BOUNDS = ((0, 59), (0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+_NAMES = (
+    None, None, None, None,
+    {name: i + 1 for i, name in enumerate(('jan', 'feb', 'mar', 'apr', 'may', 'jun',
+                                           'jul', 'aug', 'sep', 'oct', 'nov', 'dec'))},
+    {name: i for i, name in enumerate(('sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat'))},
+)
+_MACROS = {
+    '@yearly': '0 0 1 1 *',
+    '@annually': '0 0 1 1 *',
+    '@monthly': '0 0 1 * *',
+    '@weekly': '0 0 * * 0',
+    '@daily': '0 0 * * *',
+    '@midnight': '0 0 * * *',
+    '@hourly': '0 * * * *',
+}
+# 超过这个天数还没有匹配的日期(例如 0 0 30 2 *)时认为永远不会执行
+_MAX_DAYS = 366 * 5
+
+
+def _parse_value(value: str, field: int) -> int:
+    names = _NAMES[field]
+    if names and value.lower() in names:
+        return names[value.lower()]
+    if not value.isdigit():
+        raise ValueError(f"无法解析: {value}")
+    return int(value)
+
+
+def _parse_field(text: str, field: int) -> tuple[tuple, bool]:
+    """
+    返回 (排好序的取值, 是否为 *)
+    """
+    low, high = _BOUNDS[field]
+    values = set()
+    for part in text.split(','):
+        base, _, step = part.partition('/')
+        step = int(step) if step else 1
+        if step <= 0:
+            raise ValueError(f"步长必须大于 0: {part}")
+        if base in ('*', '?'):
+            start, end = low, high
+        elif '-' in base:
+            start, end = (_parse_value(v, field) for v in base.split('-', 1))
+        else:
+            start = _parse_value(base, field)
+            end = high if '/' in part else start
+        if not low <= start <= end <= high:
+            raise ValueError(f"超出范围 {low}-{high}: {part}")
+        values.update(range(start, end + 1, step))
+    if field == 5 and 7 in values:
+        values.discard(7)
+        values.add(0)
+    return tuple(sorted(values)), text in ('*', '?')
+
+
+class CronExpr:
+    """
+    cron 表达式, 支持 5 段(分 时 日 月 周)和青龙的 6 段(秒 分 时 日 月 周), 以及 @daily 等简写
+    日和周都不是 * 时, 满足其中一个即可(与 crontab 相同)
+    """
+
+    __slots__ = ('expr', 'seconds', 'minutes', 'hours', 'days', 'months', 'weekdays', '_day_any', '_weekday_any')
+
+    def __init__(self, expr: str) -> None:
+        self.expr = expr
+        fields = _MACROS.get(expr.strip().lower(), expr).split()
+        if len(fields) == 5:
+            fields = ['0'] + fields
+        if len(fields) != 6:
+            raise ValueError(f"cron 表达式应为 5 段或 6 段: {expr}")
+        parsed = [_parse_field(text, i) for i, text in enumerate(fields)]
+        self.seconds, self.minutes, self.hours, self.days, self.months, self.weekdays = (p[0] for p in parsed)
+        self._day_any = parsed[3][1]
+        self._weekday_any = parsed[5][1]
+
+    def __repr__(self) -> str:
+        return f"CronExpr({self.expr!r})"
+
+    def match_day(self, day: datetime.date) -> bool:
+        if day.month not in self.months:
+            return False
+        day_ok = day.day in self.days
+        weekday_ok = day.isoweekday() % 7 in self.weekdays
+        if self._day_any or self._weekday_any:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def day_minutes(self) -> list[int]:
+        """
+        一天中会执行的分钟(0-1439), 不考虑日期
+        """
+        return [h * 60 + m for h in self.hours for m in self.minutes]
+
+    def iter_from(self, start: datetime.datetime, end: datetime.datetime = None):
+        """
+        依次返回 >= start 且 < end 的执行时间
+        """
+        if start.microsecond:
+            start = start.replace(microsecond=0) + datetime.timedelta(seconds=1)
+        day = start.date()
+        first = (start.hour, start.minute, start.second)
+        last = end.date() if end else day + datetime.timedelta(days=_MAX_DAYS)
+        while day <= last:
+            if self.match_day(day):
+                for h in self.hours:
+                    if first and h < first[0]:
+                        continue
+                    for m in self.minutes:
+                        if first and (h, m) < first[:2]:
+                            continue
+                        for s in self.seconds:
+                            if first and (h, m, s) < first:
+                                continue
+                            run = datetime.datetime(day.year, day.month, day.day, h, m, s, tzinfo=start.tzinfo)
+                            if end and run >= end:
+                                return
+                            yield run
+            day += datetime.timedelta(days=1)
+            first = None
+
+    def next_run(self, after: datetime.datetime = None) -> datetime.datetime | None:
+        """
+        after 之后的下一次执行时间, 默认为当前时间
+        """
+        after = after or datetime.datetime.now()
+        return next(self.iter_from(after.replace(microsecond=0) + datetime.timedelta(seconds=1)), None)
+
+
+@lru_cache(maxsize=4096)
+def parse(expr: str) -> CronExpr:
+    """
+    解析 cron 表达式, 相同的表达式只解析一次
+    """
+    return CronExpr(expr)
+
+
+def schedules_of(cron: dict) -> list[str]:
+    """
+    任务的 schedule 和 extra_schedules
+    """
+    schedules = [cron['schedule']] if cron.get('schedule') else []
+    for extra in cron.get('extra_schedules') or []:
+        schedule = extra.get('schedule') if isinstance(extra, dict) else extra
+        if schedule:
+            schedules.append(schedule)
+    return schedules
+
+
+def _enabled(crons: list) -> list:
+    return [cron for cron in crons if cron.get('isDisabled') != 1]
+
+
+def next_runs(crons: list, after: datetime.datetime = None, count: int = 1) -> dict:
+    """
+    返回 {cron_id: [接下来 count 次执行时间]}, 包括 extra_schedules, 无法解析的表达式会被忽略
+    相同的表达式只计算一次
+    """
+    after = after or datetime.datetime.now()
+    computed = {}
+    result = {}
+    for cron in crons:
+        runs = []
+        for schedule in schedules_of(cron):
+            if schedule not in computed:
+                try:
+                    expr = parse(schedule)
+                except ValueError:
+                    computed[schedule] = []
+                    continue
+                iterator = expr.iter_from(after.replace(microsecond=0) + datetime.timedelta(seconds=1))
+                computed[schedule] = [run for _, run in zip(range(count), iterator)]
+            runs.extend(computed[schedule])
+        result[cron['id']] = sorted(set(runs))[:count]
+    return result
+
+
+def schedule_report(crons: list, start: datetime.datetime = None, hours: float = 24, threshold: int = 2) -> dict:
+    """
+    统计 [start, start + hours) 内每分钟的执行次数, 只统计启用的任务
+    返回 {'histogram': {分钟: 次数}, 'peak': (分钟, 次数),
+          'collisions': [{'minute', 'count', 'ids'}], 执行次数 >= threshold 的分钟, 按次数从大到小,
+          'invalid': {cron_id: 错误}}
+    """
+    if start is None:
+        start = datetime.datetime.now().replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+    end = start + datetime.timedelta(hours=hours)
+
+    by_schedule = {}
+    invalid = {}
+    for cron in _enabled(crons):
+        for schedule in schedules_of(cron):
+            by_schedule.setdefault(schedule, []).append(cron['id'])
+
+    histogram = Counter()
+    ids_by_minute = {}
+    for schedule, ids in by_schedule.items():
+        try:
+            expr = parse(schedule)
+        except ValueError as e:
+            for _id in ids:
+                invalid[_id] = e
+            continue
+        minutes = Counter(run.replace(second=0) for run in expr.iter_from(start, end))
+        for minute, runs in minutes.items():
+            histogram[minute] += runs * len(ids)
+            ids_by_minute.setdefault(minute, []).extend(ids)
+
+    collisions = [{'minute': minute, 'count': count, 'ids': sorted(set(ids_by_minute[minute]))}
+                  for minute, count in histogram.items() if count >= threshold]
+    collisions.sort(key=lambda item: (-item['count'], item['minute']))
+    return {
+        'histogram': dict(sorted(histogram.items())),
+        'peak': max(histogram.items(), key=lambda item: (item[1], -item[0].timestamp()), default=None),
+        'collisions': collisions,
+        'invalid': invalid,
+    }
+
+
+def _shift(expr: CronExpr, fields: list[str], offset: int) -> str | None:
+    """
+    把固定在某一分钟执行的表达式推迟 offset 分钟, 不能移动或会跨天时返回 None
+    """
+    if len(expr.minutes) != 1:
+        return None
+    minute = expr.minutes[0] + offset
+    if minute < 60:
+        return ' '.join(fields[:-5] + [str(minute)] + fields[-4:])
+    if len(expr.hours) != 1 or expr.hours[0] * 60 + minute >= 1440:
+        return None
+    hour = expr.hours[0] + minute // 60
+    return ' '.join(fields[:-5] + [str(minute % 60), str(hour)] + fields[-3:])
+
+
+def plan_stagger(crons: list, window: int = 30, threshold: int = 2, ids: list[int] = None) -> list[dict]:
+    """
+    把在同一分钟执行的任务分散到之后的 window 分钟内
+    只移动 schedule 的分钟(必要时进位到小时, 不跨天), 秒和日期部分保持不变, extra_schedules 只计入负载
+    负载按一天中的分钟统计, 不区分日期, 每周执行一次的任务也按每天计算
+    同一分钟执行的任务 >= threshold 个时才移动, 每个任务放到 window 内负载最低的分钟, 负载相同时选最早的
+    ids: 只移动这些任务, 其他任务只计入负载
+    返回 [{'id', 'name', 'old', 'new'}]
+    """
+    crons = _enabled(crons)
+    movable_ids = set(ids) if ids is not None else None
+    load = Counter()
+    candidates = []
+    for cron in crons:
+        schedules = schedules_of(cron)
+        try:
+            exprs = [parse(schedule) for schedule in schedules]
+        except ValueError:
+            continue
+        for expr in exprs[1:]:
+            load.update(expr.day_minutes())
+        if not exprs:
+            continue
+        if (movable_ids is None or cron['id'] in movable_ids) and len(exprs[0].minutes) == 1 \
+                and schedules[0].strip()[0] != '@':
+            candidates.append((cron, exprs[0]))
+        else:
+            load.update(exprs[0].day_minutes())
+
+    # 先让不冲突的任务和每个冲突分钟里的前几个任务保持不动, 剩下的再依次移动
+    candidates.sort(key=lambda item: (min(item[1].day_minutes()), item[0]['id']))
+    moving = []
+    for cron, expr in candidates:
+        minutes = expr.day_minutes()
+        if max(load[m] for m in minutes) + 1 < threshold:
+            load.update(minutes)
+        else:
+            moving.append((cron, expr))
+
+    plan = []
+    for cron, expr in moving:
+        fields = cron['schedule'].split()
+        best = None
+        for offset in range(window):
+            schedule = _shift(expr, fields, offset)
+            if schedule is None:
+                break
+            minutes = parse(schedule).day_minutes()
+            cost = max(load[m] for m in minutes)
+            if best is None or cost < best[0]:
+                best = (cost, schedule, minutes)
+            if cost == 0:
+                break
+        load.update(best[2])
+        if best[1] != cron['schedule']:
+            plan.append({'id': cron['id'], 'name': cron.get('name'), 'old': cron['schedule'], 'new': best[1]})
+    return plan
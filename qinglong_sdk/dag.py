@@ -0,0 +1,206 @@
+import time
+
+
+def find_cycle(graph: dict) -> list | None:
+    """
+    graph: {节点: [依赖的节点]}, 存在循环依赖时返回环上的节点 [a, b, ..., a], 否则返回 None
+    """
+    # 0 未访问, 1 访问中, 2 已完成
+    color = {}
+    for root in graph:
+        if color.get(root):
+            continue
+        stack = [(root, iter(graph.get(root, ())))]
+        path = [root]
+        color[root] = 1
+        while stack:
+            node, deps = stack[-1]
+            for dep in deps:
+                state = color.get(dep, 0)
+                if state == 1:
+                    return path[path.index(dep):] + [dep]
+                if state == 0:
+                    color[dep] = 1
+                    path.append(dep)
+                    stack.append((dep, iter(graph.get(dep, ()))))
+                    break
+            else:
+                color[node] = 2
+                path.pop()
+                stack.pop()
+    return None
+
+
+class CronDAG:
+    """
+    按 task_before/task_after 或指定的依赖关系运行定时任务: 依赖都完成后才触发, 最多同时运行 parallelism 个,
+    同时可以运行的任务中, 所在依赖链(关键路径)剩余耗时最长的优先
+
+    dag = CronDAG.from_crons(ql.crons_get_all(raw=True)['data'], ids=[1, 2, 3])
+    dag = CronDAG({3: [1, 2], 4: [3]})   # 3 依赖 1 和 2, 4 依赖 3
+    result = dag.run(ql, parallelism=4)
+    """
+
+    def __init__(self, graph: dict, durations: dict = None) -> None:
+        """
+        graph: {cron_id: [依赖的 cron_id]}
+        durations: {cron_id: 预计耗时(秒)}, 用于计算关键路径, 默认都为 1
+        """
+        self.deps = {node: set(deps or ()) for node, deps in graph.items()}
+        for deps in list(self.deps.values()):
+            for dep in deps:
+                self.deps.setdefault(dep, set())
+        cycle = find_cycle(self.deps)
+        if cycle:
+            raise ValueError(f"存在循环依赖: {' -> '.join(str(node) for node in cycle)}")
+        self.children = {node: set() for node in self.deps}
+        for node, deps in self.deps.items():
+            for dep in deps:
+                self.children[dep].add(node)
+        durations = durations or {}
+        self.durations = {node: durations.get(node) or 1 for node in self.deps}
+        self.rank = self._rank()
+
+    @classmethod
+    def from_crons(cls, crons: list, ids: list[int] = None) -> 'CronDAG':
+        """
+        从 crons_get_all 的结果创建: 任务 X 的 task_before 中的任务先于 X 运行, task_after 中的任务在 X 之后运行
+        ids: 只包含这些任务(以及它们之间的依赖), 默认为所有有依赖关系的任务
+        预计耗时取 last_running_time, task_before/task_after 不是 id 列表(例如面板上的命令字符串)时忽略
+        """
+        by_id = {cron['id']: cron for cron in crons}
+        graph = {}
+        for cron in crons:
+            task_before, task_after = cron.get('task_before'), cron.get('task_after')
+            for before in task_before if isinstance(task_before, list) else ():
+                if before in by_id:
+                    graph.setdefault(cron['id'], set()).add(before)
+            for after in task_after if isinstance(task_after, list) else ():
+                if after in by_id:
+                    graph.setdefault(after, set()).add(cron['id'])
+        if ids is not None:
+            nodes = set(ids)
+            graph = {node: graph.get(node, set()) & nodes for node in nodes}
+        durations = {_id: cron.get('last_running_time') for _id, cron in by_id.items()}
+        return cls(graph, durations)
+
+    def _rank(self) -> dict:
+        """
+        从每个节点到终点的最长耗时
+        """
+        rank = {}
+        for node in reversed(self.order()):
+            rank[node] = self.durations[node] + max((rank[child] for child in self.children[node]), default=0)
+        return rank
+
+    def order(self) -> list:
+        """
+        拓扑排序
+        """
+        remaining = {node: len(deps) for node, deps in self.deps.items()}
+        ready = [node for node, count in remaining.items() if count == 0]
+        result = []
+        while ready:
+            node = ready.pop()
+            result.append(node)
+            for child in self.children[node]:
+                remaining[child] -= 1
+                if remaining[child] == 0:
+                    ready.append(child)
+        return result
+
+    def critical_path(self) -> list:
+        """
+        预计耗时最长的依赖链
+        """
+        roots = [node for node, deps in self.deps.items() if not deps]
+        if not roots:
+            return []
+        node = max(roots, key=self.rank.get)
+        path = [node]
+        while self.children[node]:
+            node = max(self.children[node], key=self.rank.get)
+            path.append(node)
+        return path
+
+    def _descendants(self, node) -> set:
+        result = set()
+        stack = [node]
+        while stack:
+            for child in self.children[stack.pop()]:
+                if child not in result:
+                    result.add(child)
+                    stack.append(child)
+        return result
+
+    def run(self, ql, parallelism: int = 4, timeout: float = None,
+            min_interval: float = 1, max_interval: float = 10, on_finish=None) -> dict:
+        """
+        ql: QL
+        parallelism: 同时运行的任务数
+        timeout: 总超时时间(秒)
+        min_interval/max_interval: 轮询间隔, 每轮只调用一次 crons_get_all, 没有任务结束时翻倍
+        on_finish(cron_id, result): 任务结束时调用
+        返回 {cron_id: {'status': 'finished' | 'failed' | 'missing' | 'skipped' | 'timeout' | 'pending',
+                        'started', 'finished', 'duration', 'error'}}
+        青龙的接口不返回任务的退出状态, 只有 crons_run 调用失败时才视为 failed, 运行期间被删除的任务为 missing,
+        依赖 failed 或 missing 任务的任务为 skipped
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waiting = {node: set(deps) for node, deps in self.deps.items()}
+        running = {}
+        result = {}
+        interval = min_interval
+
+        def finish(node, status, **fields):
+            state = running.pop(node, {})
+            started = state.get('started')
+            now = time.time()
+            result[node] = {'status': status, 'started': started, 'finished': now if started else None,
+                            'duration': fields.pop('duration', None) or (now - started if started else None),
+                            'error': None}
+            result[node].update(fields)
+            if status == 'finished':
+                for child in self.children[node]:
+                    if child in waiting:
+                        waiting[child].discard(node)
+            elif status in ('failed', 'missing'):
+                for child in self._descendants(node):
+                    if child in waiting:
+                        del waiting[child]
+                        result[child] = {'status': 'skipped', 'started': None, 'finished': None,
+                                         'duration': None, 'error': None}
+            if on_finish:
+                on_finish(node, result[node])
+
+        while waiting or running:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            ready = sorted((node for node, deps in waiting.items() if not deps),
+                           key=lambda node: -self.rank[node])[:max(0, parallelism - len(running))]
+            if ready:
+                for node in ready:
+                    del waiting[node]
+                try:
+                    running.update(ql._run_tracked(ready))
+                except Exception as e:
+                    for node in ready:
+                        finish(node, 'failed', error=e)
+                    continue
+                interval = min_interval
+
+            if not running:
+                break
+            time.sleep(interval if deadline is None else max(0, min(interval, deadline - time.monotonic())))
+
+            finished = ql._poll_running(running)
+            for node, state in finished.items():
+                finish(node, state['status'], duration=state['duration'],
+                       error='任务不存在' if state['status'] == 'missing' else None)
+            interval = min_interval if finished else min(interval * 2, max_interval)
+
+        for node in list(running):
+            finish(node, 'timeout')
+        for node in waiting:
+            result[node] = {'status': 'pending', 'started': None, 'finished': None, 'duration': None, 'error': None}
+        return result
@@ -0,0 +1,44 @@
+class QLError(Exception):
+    """
+    SDK 异常基类
+    """
+
+    def __init__(self, message: str, method: str = None, endpoint: str = None, status: int = None) -> None:
+        super().__init__(message)
+        self.method = method
+        self.endpoint = endpoint
+        self.status = status
+
+
+class QLHTTPError(QLError):
+    """
+    面板返回了非 200 的状态码
+    """
+
+    def __init__(self, method: str, endpoint: str, status: int, text: str) -> None:
+        super().__init__(f"请求失败：{method} {endpoint} {status} {text}", method, endpoint, status)
+        self.text = text
+
+
+class QLAuthError(QLHTTPError):
+    """
+    401, 重新登录后仍然失败
+    """
+
+
+class QLConnectionError(QLError):
+    """
+    连接失败或超时
+    """
+
+
+class QLCircuitOpenError(QLError):
+    """
+    熔断器打开, 请求未发送
+    """
+
+
+class QLConflictError(QLError):
+    """
+    保存时发现内容已被其他人修改
+    """
@@ -0,0 +1,169 @@
+import contextlib
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+MANIFEST_NAME = ".manifest.json"
+# 编码、计算哈希和写入时每次处理的字符数
+CHUNK_SIZE = 1 << 20
+
+
+def iter_log_files(tree, parent: str = ''):
+    """
+    遍历 logs_get_all 的结果, yield (directory, filename, fingerprint)
+    兼容新版的树形结构 {'title', 'key', 'type', 'children'} 和旧版的 {'name', 'isDir', 'files'}
+    fingerprint 由列表中的 size/mtime 等字段组成, 没有这些字段时为 None
+    """
+    if isinstance(tree, dict):
+        tree = tree.get('data') or tree.get('dirs') or []
+    for node in tree or []:
+        if isinstance(node, str):
+            yield parent, node, None
+            continue
+        if 'files' in node:
+            directory = node.get('name') or node.get('title') or ''
+            for filename in node['files']:
+                yield directory, filename, None
+            continue
+        name = node.get('title') or node.get('name') or ''
+        if node.get('children') is not None or node.get('type') == 'directory' or node.get('isDir'):
+            yield from iter_log_files(node.get('children') or [], f"{parent}/{name}" if parent else name)
+        else:
+            directory = node.get('parent', parent) or ''
+            meta = [node.get(k) for k in ('size', 'mtime', 'createTime', 'updatedAt')]
+            fingerprint = '|'.join(str(v) for v in meta) if any(v is not None for v in meta) else None
+            yield directory, name, fingerprint
+
+
+def newest_by_directory(files: list) -> dict:
+    """
+    没有 size/mtime 时无法判断文件是否变化, 返回每个目录中最新(文件名最大)的文件, 它可能还在写入
+    """
+    newest = {}
+    for directory, filename, fingerprint in files:
+        if fingerprint is None and filename > newest.get(directory, ''):
+            newest[directory] = filename
+    return newest
+
+
+def _load_manifest(path: str) -> dict:
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(path: str, manifest: dict) -> None:
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.manifest-')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    os.replace(tmp, path)
+
+
+def _chunks(content: str):
+    for start in range(0, len(content), CHUNK_SIZE):
+        yield content[start:start + CHUNK_SIZE].encode('utf-8')
+
+
+def _sha1(content: str) -> str:
+    sha = hashlib.sha1()
+    for chunk in _chunks(content):
+        sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _write(path: str, content: str, compress: bool) -> str:
+    """
+    分块编码并写入临时文件, 完成后原子替换, 不会在内存中再复制一份完整的字节串
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    sha = hashlib.sha1()
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.log-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            out = gzip.GzipFile(fileobj=f, mode='wb', mtime=0) if compress else f
+            for chunk in _chunks(content):
+                sha.update(chunk)
+                out.write(chunk)
+            if compress:
+                out.close()
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp)
+        raise
+    return sha.hexdigest()
+
+
+def _local_path(dest_dir: str, key: str, compress: bool) -> str:
+    """
+    日志在本地的路径, 不在 dest_dir 下时(例如文件名包含 ..)抛出 ValueError
+    """
+    root = os.path.realpath(dest_dir)
+    path = os.path.realpath(os.path.join(root, *key.split('/')) + ('.gz' if compress else ''))
+    if os.path.commonpath([root, path]) != root or path == root:
+        raise ValueError(f"日志路径不在目标目录内: {key}")
+    return path
+
+
+def sync_logs(ql, dest_dir: str, max_workers: int = 8, compress: bool = False) -> dict:
+    """
+    把面板上的日志增量同步到本地目录, 见 QL.logs_sync
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    manifest_path = os.path.join(dest_dir, MANIFEST_NAME)
+    manifest = _load_manifest(manifest_path)
+
+    files = list(iter_log_files(ql.logs_get_all()))
+    newest = newest_by_directory(files)
+
+    todo = []
+    report = {'downloaded': [], 'unchanged': [], 'skipped': 0, 'failed': {}}
+    for directory, filename, fingerprint in files:
+        key = f"{directory}/{filename}" if directory else filename
+        entry = manifest.get(key)
+        if entry is not None and entry.get('compress') == compress:
+            if fingerprint is not None and entry.get('fingerprint') == fingerprint:
+                report['skipped'] += 1
+                continue
+            if fingerprint is None and newest.get(directory) != filename:
+                report['skipped'] += 1
+                continue
+        try:
+            path = _local_path(dest_dir, key, compress)
+        except ValueError as e:
+            report['failed'][key] = e
+            continue
+        todo.append((key, directory, filename, fingerprint, path))
+
+    def fetch(key, directory, filename, path):
+        # 接口把日志放在 JSON 的 data 字段里返回, 只能整体解析; 之后分块计算哈希和写入磁盘
+        content = ql.logs_get_detail(directory, filename)
+        if not isinstance(content, str):
+            content = json.dumps(content, ensure_ascii=False)
+        sha = _sha1(content)
+        entry = manifest.get(key)
+        if entry is not None and entry.get('sha1') == sha and entry.get('compress') == compress and os.path.exists(path):
+            return sha, False
+        return _write(path, content, compress), True
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(fetch, key, directory, filename, path): (key, fingerprint)
+                       for key, directory, filename, fingerprint, path in todo}
+            for future in as_completed(futures):
+                key, fingerprint = futures[future]
+                try:
+                    sha, written = future.result()
+                except Exception as e:
+                    report['failed'][key] = e
+                    continue
+                manifest[key] = {'fingerprint': fingerprint, 'sha1': sha, 'compress': compress}
+                report['downloaded' if written else 'unchanged'].append(key)
+    finally:
+        _save_manifest(manifest_path, manifest)
+    return report
@@ -0,0 +1,169 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from qinglong_sdk.log_archive import iter_log_files, newest_by_directory
+from qinglong_sdk.ql_sdk import _data_list
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS logs (
+    id INTEGER PRIMARY KEY,
+    directory TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    cron_id INTEGER,
+    created REAL,
+    fingerprint TEXT,
+    sha1 TEXT,
+    UNIQUE (directory, filename)
+);
+CREATE INDEX IF NOT EXISTS logs_cron ON logs (cron_id, created);
+CREATE INDEX IF NOT EXISTS logs_created ON logs (created);
+"""
+# 不保存原文, 只保存索引; SQLite < 3.43 不支持 contentless_delete, 退回到保存原文的表
+_FTS = "CREATE VIRTUAL TABLE IF NOT EXISTS logs_fts USING fts5(content, content='', contentless_delete=1)"
+_FTS_FALLBACK = "CREATE VIRTUAL TABLE IF NOT EXISTS logs_fts USING fts5(content)"
+
+
+def _log_time(filename: str) -> float | None:
+    """
+    青龙的日志文件名形如 2024-01-01-00-00-00-123.log
+    """
+    try:
+        return time.mktime(time.strptime(filename[:19], '%Y-%m-%d-%H-%M-%S'))
+    except ValueError:
+        return None
+
+
+class LogIndex:
+    """
+    基于 SQLite FTS5 的本地日志全文索引
+
+    index = LogIndex('logs.db')
+    index.update(ql)
+    index.search_logs('Traceback', since=time.time() - 86400)
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        path: 索引数据库文件路径
+        """
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.executescript(_SCHEMA)
+        try:
+            self._conn.execute(_FTS)
+        except sqlite3.OperationalError:
+            self._conn.execute(_FTS_FALLBACK)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @staticmethod
+    def _cron_directories(ql) -> dict:
+        directories = {}
+        for cron in _data_list(ql.crons_get_all(raw=True)):
+            log_dir = cron.get('log_name') or os.path.dirname(cron.get('log_path') or '')
+            if log_dir:
+                directories[log_dir] = cron['id']
+        return directories
+
+    def update(self, ql, max_workers: int = 8) -> dict:
+        """
+        增量更新索引: 只下载新增或变化的日志, 并按日志目录关联 cron_id
+        返回 {'indexed': n, 'skipped': n, 'failed': {文件: 异常}}
+        """
+        files = list(iter_log_files(ql.logs_get_all()))
+        newest = newest_by_directory(files)
+        directories = self._cron_directories(ql)
+        with self._lock:
+            known = {(d, f): (fp, sha) for d, f, fp, sha in
+                     self._conn.execute("SELECT directory, filename, fingerprint, sha1 FROM logs")}
+
+        todo = []
+        report = {'indexed': 0, 'skipped': 0, 'failed': {}}
+        for directory, filename, fingerprint in files:
+            entry = known.get((directory, filename))
+            if entry is not None and (
+                    (fingerprint is not None and entry[0] == fingerprint)
+                    or (fingerprint is None and newest.get(directory) != filename)):
+                report['skipped'] += 1
+                continue
+            todo.append((directory, filename, fingerprint))
+
+        def fetch(directory, filename):
+            content = ql.logs_get_detail(directory, filename)
+            if not isinstance(content, str):
+                content = json.dumps(content, ensure_ascii=False)
+            return content
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(fetch, directory, filename): (directory, filename, fingerprint)
+                       for directory, filename, fingerprint in todo}
+            for future in as_completed(futures):
+                directory, filename, fingerprint = futures[future]
+                try:
+                    content = future.result()
+                except Exception as e:
+                    report['failed'][f"{directory}/{filename}"] = e
+                    continue
+                sha = hashlib.sha1(content.encode('utf-8')).hexdigest()
+                if known.get((directory, filename), (None, None))[1] == sha:
+                    report['skipped'] += 1
+                    continue
+                cron_id = directories.get(directory)
+                created = _log_time(filename) or time.time()
+                self._store(directory, filename, cron_id, created, fingerprint, sha, content)
+                report['indexed'] += 1
+        return report
+
+    def _store(self, directory, filename, cron_id, created, fingerprint, sha, content) -> None:
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT id FROM logs WHERE directory = ? AND filename = ?",
+                                     (directory, filename)).fetchone()
+            if row is not None:
+                self._conn.execute("DELETE FROM logs_fts WHERE rowid = ?", (row[0],))
+                self._conn.execute("UPDATE logs SET cron_id = ?, created = ?, fingerprint = ?, sha1 = ? WHERE id = ?",
+                                   (cron_id, created, fingerprint, sha, row[0]))
+                rowid = row[0]
+            else:
+                rowid = self._conn.execute(
+                    "INSERT INTO logs (directory, filename, cron_id, created, fingerprint, sha1) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (directory, filename, cron_id, created, fingerprint, sha)).lastrowid
+            self._conn.execute("INSERT INTO logs_fts (rowid, content) VALUES (?, ?)", (rowid, content))
+
+    def search_logs(self, query: str, since: float = None, cron_ids: list[int] = None, limit: int = 100) -> list[dict]:
+        """
+        全文搜索日志
+        query: FTS5 查询语句, 如 'Traceback', '"connection reset"', 'error AND timeout'
+        since: 只搜索该时间戳之后的日志
+        cron_ids: 只搜索这些任务的日志
+        返回 [{'directory', 'filename', 'cron_id', 'created'}], 按时间倒序
+        """
+        sql = ("SELECT logs.directory, logs.filename, logs.cron_id, logs.created FROM logs_fts "
+               "JOIN logs ON logs.id = logs_fts.rowid WHERE logs_fts MATCH ?")
+        args = [query]
+        if since is not None:
+            sql += " AND logs.created >= ?"
+            args.append(since)
+        if cron_ids:
+            sql += f" AND logs.cron_id IN ({','.join('?' * len(cron_ids))})"
+            args.extend(cron_ids)
+        sql += " ORDER BY logs.created DESC LIMIT ?"
+        args.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        return [{'directory': d, 'filename': f, 'cron_id': c, 'created': t} for d, f, c, t in rows]
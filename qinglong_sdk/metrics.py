@@ -0,0 +1,171 @@
+import bisect
+import threading
+from typing import Callable
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def endpoint_of(api_path: str) -> str:
+    """
+    /open/crons/12/log -> /open/crons/{id}/log, 避免每个id都产生一组指标
+    """
+    return '/'.join('{id}' if part.isdigit() else part for part in api_path.split('/'))
+
+
+class _Histogram:
+    __slots__ = ('buckets', 'counts', 'count', 'sum')
+
+    def __init__(self, buckets: tuple) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float | None:
+        """
+        按桶估算分位数(取桶的上界)
+        """
+        if not self.count:
+            return None
+        target = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return float('inf')
+
+
+class Metrics:
+    """
+    按 (method, endpoint) 统计请求数、错误数、重试数、流量和耗时分布, 并提供追踪钩子
+
+    metrics = Metrics(on_error=lambda method, endpoint, error: logger.warning(error))
+    ql = QL(url, client_id, client_secret, metrics=metrics)
+    print(metrics.stats())
+    print(metrics.to_prometheus())
+    """
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS,
+                 on_request: Callable = None,
+                 on_response: Callable = None,
+                 on_error: Callable = None) -> None:
+        """
+        buckets: 耗时直方图的桶(秒)
+        on_request(method, endpoint, bytes_out): 请求发送前调用
+        on_response(method, endpoint, status, elapsed, bytes_in): 收到响应后调用
+        on_error(method, endpoint, error): 请求异常时调用
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.on_request = [on_request] if on_request else []
+        self.on_response = [on_response] if on_response else []
+        self.on_error = [on_error] if on_error else []
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _get(self, method: str, endpoint: str) -> dict:
+        key = (method, endpoint)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = {'requests': 0, 'errors': 0, 'retries': 0,
+                                          'bytes_in': 0, 'bytes_out': 0,
+                                          'latency': _Histogram(self.buckets)}
+        return series
+
+    def request_started(self, method: str, api_path: str, bytes_out: int) -> None:
+        endpoint = endpoint_of(api_path)
+        with self._lock:
+            series = self._get(method, endpoint)
+            series['requests'] += 1
+            series['bytes_out'] += bytes_out
+        for hook in self.on_request:
+            hook(method, endpoint, bytes_out)
+
+    def request_finished(self, method: str, api_path: str, status: int, elapsed: float, bytes_in: int) -> None:
+        endpoint = endpoint_of(api_path)
+        with self._lock:
+            series = self._get(method, endpoint)
+            series['latency'].observe(elapsed)
+            series['bytes_in'] += bytes_in
+            if status >= 400:
+                series['errors'] += 1
+        for hook in self.on_response:
+            hook(method, endpoint, status, elapsed, bytes_in)
+
+    def request_failed(self, method: str, api_path: str, error: Exception, elapsed: float) -> None:
+        endpoint = endpoint_of(api_path)
+        with self._lock:
+            series = self._get(method, endpoint)
+            series['latency'].observe(elapsed)
+            series['errors'] += 1
+        for hook in self.on_error:
+            hook(method, endpoint, error)
+
+    def retried(self, method: str, api_path: str) -> None:
+        with self._lock:
+            self._get(method, endpoint_of(api_path))['retries'] += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def stats(self) -> dict:
+        """
+        返回 {'GET /open/crons': {'requests', 'errors', 'retries', 'bytes_in', 'bytes_out',
+                                  'latency_avg', 'latency_p50', 'latency_p99'}}
+        """
+        result = {}
+        with self._lock:
+            for (method, endpoint), series in self._series.items():
+                latency = series['latency']
+                result[f"{method} {endpoint}"] = {
+                    'requests': series['requests'],
+                    'errors': series['errors'],
+                    'retries': series['retries'],
+                    'bytes_in': series['bytes_in'],
+                    'bytes_out': series['bytes_out'],
+                    'latency_avg': latency.sum / latency.count if latency.count else None,
+                    'latency_p50': latency.quantile(0.5),
+                    'latency_p99': latency.quantile(0.99),
+                }
+        return result
+
+    def to_prometheus(self, prefix: str = 'qinglong_sdk') -> str:
+        """
+        Prometheus 文本格式
+        """
+        lines = []
+        counters = (('requests', 'requests_total', '请求数'),
+                    ('errors', 'errors_total', '失败的请求数'),
+                    ('retries', 'retries_total', '重试次数'),
+                    ('bytes_in', 'response_bytes_total', '响应字节数'),
+                    ('bytes_out', 'request_bytes_total', '请求字节数'))
+        with self._lock:
+            items = sorted(self._series.items())
+            for field, name, doc in counters:
+                lines.append(f"# HELP {prefix}_{name} {doc}")
+                lines.append(f"# TYPE {prefix}_{name} counter")
+                for (method, endpoint), series in items:
+                    lines.append(f'{prefix}_{name}{{method="{method}",endpoint="{endpoint}"}} {series[field]}')
+
+            name = f"{prefix}_request_duration_seconds"
+            lines.append(f"# HELP {name} 请求耗时")
+            lines.append(f"# TYPE {name} histogram")
+            for (method, endpoint), series in items:
+                latency = series['latency']
+                labels = f'method="{method}",endpoint="{endpoint}"'
+                cumulative = 0
+                for bound, count in zip(latency.buckets, latency.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {latency.count}')
+                lines.append(f'{name}_sum{{{labels}}} {latency.sum}')
+                lines.append(f'{name}_count{{{labels}}} {latency.count}')
+        return '\n'.join(lines) + '\n'
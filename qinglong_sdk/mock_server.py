@@ -0,0 +1,440 @@
+"""
+本地模拟的青龙 OpenAPI 服务, 只依赖标准库, 用于离线测试和性能基准
+
+    with MockQLServer(latency=0.005, error_rate=0.01) as server:
+        server.seed(crons=1000, envs=500, logs=100)
+        ql = QL(server.url, server.client_id, server.client_secret)
+
+也可以直接运行: python -m qinglong_sdk.mock_server --port 5700
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+CLIENT_ID = "mock_client_id"
+CLIENT_SECRET = "mock_client_secret"
+
+
+class _HTTPError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def _match(item: dict, cond: dict) -> bool:
+    field = item.get(cond['property'])
+    operation = cond['operation']
+    value = cond['value']
+    if operation in ('Reg', 'NotReg'):
+        values = field if isinstance(field, list) else [field]
+        found = any(str(value).lower() in str(v).lower() for v in values)
+        return found if operation == 'Reg' else not found
+    if operation in ('In', 'Nin'):
+        value = value if isinstance(value, list) else [value]
+        values = field if isinstance(field, list) else [field]
+        found = any(v in value for v in values)
+        return found if operation == 'In' else not found
+    raise _HTTPError(400, f"unknown operation: {operation}")
+
+
+class _State:
+    """
+    面板数据, 所有修改都在锁内进行
+    """
+
+    def __init__(self, run_time: float, clock_skew: float = 0) -> None:
+        self.lock = threading.RLock()
+        self.run_time = run_time
+        self.clock_skew = clock_skew
+        self.token = None
+        self.next_id = 1
+        self.crons = {}
+        self.views = {}
+        self.envs = {}
+        self.subs = {}
+        self.configs = {'config.sh': '## config\nexport TZ="Asia/Shanghai"\n', 'extra.sh': '', 'task_before.sh': ''}
+        # {directory: {filename: content}}
+        self.logs = {}
+
+    def new_id(self) -> int:
+        self.next_id += 1
+        return self.next_id - 1
+
+    def refresh(self, cron: dict) -> dict:
+        """
+        运行中的任务在 run_time 秒后结束, 读取时再更新状态
+        """
+        finish_at = cron.get('_finish_at')
+        if finish_at is not None and time.time() >= finish_at:
+            cron['status'] = 1
+            cron['pid'] = None
+            cron['last_running_time'] = round(finish_at + self.clock_skew - cron['last_execution_time'], 3)
+            cron['_log'] += f"## 执行结束... {time.strftime('%Y-%m-%d %H:%M:%S')}  耗时 {cron['last_running_time']} 秒\n"
+            self.logs.setdefault(cron['log_name'], {})[cron['_log_file']] = cron['_log']
+            cron['_finish_at'] = None
+        return cron
+
+    @staticmethod
+    def public(item: dict) -> dict:
+        return {k: v for k, v in item.items() if not k.startswith('_')}
+
+
+class MockQLServer:
+    """
+    latency: 每个请求额外的延迟(秒)
+    error_rate: 随机返回 500 的概率
+    run_time: 任务运行时长(秒)
+    clock_skew: 面板时钟与本机的差(秒), 负数表示面板时钟较慢, 影响 last_execution_time
+    """
+
+    client_id = CLIENT_ID
+    client_secret = CLIENT_SECRET
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0,
+                 latency: float = 0,
+                 error_rate: float = 0,
+                 run_time: float = 0.5,
+                 clock_skew: float = 0) -> None:
+        self.latency = latency
+        self.error_rate = error_rate
+        self.state = _State(run_time, clock_skew)
+        self.requests = 0
+        handler = type('Handler', (_Handler,), {'server_ref': self})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'MockQLServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def seed(self, crons: int = 0, envs: int = 0, logs: int = 0, log_lines: int = 50) -> None:
+        """
+        生成测试数据: crons 个任务, envs 个环境变量, 每个任务 logs 个日志文件
+        """
+        state = self.state
+        with state.lock:
+            for i in range(crons):
+                self._add_cron({'command': f'task script_{i}.py', 'schedule': f'{i % 60} {i % 24} * * *',
+                                'name': f'script_{i}', 'labels': [f'group{i % 10}']})
+            for i in range(envs):
+                self._add_env({'name': f'ENV_{i % 50}', 'value': f'value_{i}', 'remarks': f'remark {i}'})
+            for cron in list(state.crons.values())[:crons]:
+                files = state.logs.setdefault(cron['log_name'], {})
+                for j in range(logs):
+                    filename = f"2024-01-{j % 28 + 1:02d}-00-00-{j:02d}.log"
+                    files[filename] = ''.join(f"[{cron['name']}] line {k} of run {j}\n" for k in range(log_lines))
+
+    def _add_cron(self, payload: dict) -> dict:
+        state = self.state
+        _id = state.new_id()
+        name = payload.get('name') or payload['command']
+        cron = {'id': _id, 'name': name, 'command': payload['command'], 'schedule': payload['schedule'],
+                'labels': payload.get('labels') or [], 'sub_id': payload.get('sub_id'),
+                'extra_schedules': payload.get('extra_schedules'),
+                'task_before': payload.get('task_before'), 'task_after': payload.get('task_after'),
+                'status': 1, 'isDisabled': 0, 'isPinned': 0, 'pid': None,
+                'log_name': re.sub(r'[^\w.-]', '_', payload['command'].split()[-1]),
+                'log_path': None, 'last_execution_time': None, 'last_running_time': None,
+                'createdAt': time.strftime('%Y-%m-%dT%H:%M:%S'), '_log': '', '_finish_at': None}
+        state.crons[_id] = cron
+        return cron
+
+    def _add_env(self, payload: dict) -> dict:
+        state = self.state
+        _id = state.new_id()
+        env = {'id': _id, 'name': payload['name'], 'value': payload['value'],
+               'remarks': payload.get('remarks') or '', 'status': 0, 'position': float(_id)}
+        state.envs[_id] = env
+        return env
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server_ref: MockQLServer = None
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _reply(self, status: int, data=None, message: str = None) -> None:
+        body = json.dumps({'code': status, 'data': data, 'message': message}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, method: str) -> None:
+        server = self.server_ref
+        server.requests += 1
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        if server.latency:
+            time.sleep(server.latency)
+        if server.error_rate and random.random() < server.error_rate:
+            return self._reply(500, message='injected error')
+
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        path = url.path.rstrip('/')
+        try:
+            payload = json.loads(body) if body else None
+        except ValueError:
+            return self._reply(400, message='invalid json')
+
+        state = server.state
+        try:
+            if path == '/open/auth/token':
+                if query.get('client_id') != CLIENT_ID or query.get('client_secret') != CLIENT_SECRET:
+                    raise _HTTPError(400, 'client_id 或 client_secret 有误')
+                with state.lock:
+                    state.token = uuid.uuid4().hex
+                return self._reply(200, {'token': state.token, 'token_type': 'Bearer',
+                                         'expiration': int(time.time()) + 30 * 86400})
+            if self.headers.get('Authorization') != f"Bearer {state.token}" or state.token is None:
+                raise _HTTPError(401, 'UnauthorizedError')
+            with state.lock:
+                data = _route(server, method, path, query, payload)
+        except _HTTPError as e:
+            return self._reply(e.status, message=str(e))
+        except (KeyError, TypeError, ValueError) as e:
+            return self._reply(400, message=repr(e))
+        self._reply(200, data)
+
+    def do_GET(self) -> None:
+        self._handle('GET')
+
+    def do_POST(self) -> None:
+        self._handle('POST')
+
+    def do_PUT(self) -> None:
+        self._handle('PUT')
+
+    def do_DELETE(self) -> None:
+        self._handle('DELETE')
+
+
+def _paginate(items: list, query: dict):
+    if 'page' not in query:
+        return items
+    page = int(query['page'])
+    size = int(query.get('size') or 20)
+    return {'data': items[(page - 1) * size:page * size], 'total': len(items)}
+
+
+def _route(server: MockQLServer, method: str, path: str, query: dict, payload):
+    state = server.state
+    parts = path.split('/')[2:]
+    resource = parts[0] if parts else ''
+    rest = parts[1:]
+
+    if resource == 'crons':
+        if rest == ['views']:
+            if method == 'GET':
+                return [dict(v) for v in state.views.values()]
+            if method == 'POST':
+                view = {'id': state.new_id(), 'name': payload['name'], 'filters': payload.get('filters') or [],
+                        'sorts': payload.get('sorts') or [], 'filterRelation': payload.get('filterRelation', 'and'),
+                        'isDisabled': 0}
+                state.views[view['id']] = view
+                return view
+            if method == 'DELETE':
+                for _id in payload:
+                    state.views.pop(_id, None)
+                return None
+        if not rest:
+            if method == 'GET':
+                crons = [state.public(state.refresh(c)) for c in state.crons.values()]
+                search = query.get('searchValue')
+                if search:
+                    crons = [c for c in crons if search in c['name'] or search in c['command']]
+                if query.get('queryString'):
+                    q = json.loads(query['queryString'])
+                    filters = q.get('filters') or []
+                    if filters:
+                        combine = any if q.get('filterRelation') == 'or' else all
+                        crons = [c for c in crons if combine(_match(c, f) for f in filters)]
+                if query.get('sorter'):
+                    sorter = json.loads(query['sorter'])
+                    crons.sort(key=lambda c: (c.get(sorter['field']) is None, c.get(sorter['field'])),
+                               reverse=sorter.get('type') == 'DESC')
+                return _paginate(crons, query) if 'page' in query else {'data': crons, 'total': len(crons)}
+            if method == 'POST':
+                return state.public(server._add_cron(payload))
+            if method == 'PUT':
+                cron = state.crons[payload['id']]
+                for key in ('command', 'schedule', 'name', 'labels', 'sub_id',
+                            'extra_schedules', 'task_before', 'task_after'):
+                    if key in payload:
+                        cron[key] = payload[key]
+                cron['labels'] = cron['labels'] or []
+                return state.public(cron)
+            if method == 'DELETE':
+                for _id in payload:
+                    state.crons.pop(_id, None)
+                return None
+        if rest == ['labels']:
+            for _id in payload['ids']:
+                cron = state.crons[_id]
+                if method == 'POST':
+                    cron['labels'] = list(dict.fromkeys(cron['labels'] + payload['labels']))
+                else:
+                    cron['labels'] = [label for label in cron['labels'] if label not in payload['labels']]
+            return None
+        if rest and rest[0] in ('run', 'stop', 'enable', 'disable') and method == 'PUT':
+            now = time.time()
+            for _id in payload:
+                cron = state.refresh(state.crons[_id])
+                if rest[0] == 'run':
+                    log_file = time.strftime('%Y-%m-%d-%H-%M-%S', time.localtime(now)) + f"-{int(now * 1000) % 1000:03d}.log"
+                    cron.update(status=0, pid=random.randint(1000, 65535), last_execution_time=int(now + state.clock_skew),
+                                _finish_at=now + state.run_time, _log_file=log_file,
+                                log_path=f"{cron['log_name']}/{log_file}",
+                                _log=f"## 开始执行... {time.strftime('%Y-%m-%d %H:%M:%S')}\n{cron['command']}\n")
+                    state.logs.setdefault(cron['log_name'], {})[log_file] = cron['_log']
+                elif rest[0] == 'stop':
+                    if cron.get('_finish_at'):
+                        cron['_finish_at'] = now
+                        state.refresh(cron)
+                else:
+                    cron['isDisabled'] = 0 if rest[0] == 'enable' else 1
+            return None
+        if rest and rest[0].isdigit():
+            cron = state.refresh(state.crons.get(int(rest[0])) or {})
+            if not cron:
+                raise _HTTPError(404, 'cron not found')
+            if len(rest) == 1 and method == 'GET':
+                return state.public(cron)
+            if rest[1:] == ['log']:
+                return cron['_log']
+            if rest[1:] == ['logs']:
+                files = state.logs.get(cron['log_name'], {})
+                return [{'filename': f, 'directory': cron['log_name'], 'time': 0} for f in sorted(files, reverse=True)]
+
+    elif resource == 'envs':
+        if not rest:
+            if method == 'GET':
+                envs = [dict(e) for e in state.envs.values()]
+                search = query.get('searchValue')
+                if search:
+                    envs = [e for e in envs if search in e['name'] or search in e['value'] or search in e['remarks']]
+                return _paginate(envs, query)
+            if method == 'POST':
+                return [dict(server._add_env(e)) for e in payload]
+            if method == 'PUT':
+                env = state.envs[payload['id']]
+                env.update({k: payload[k] for k in ('name', 'value', 'remarks') if k in payload})
+                return dict(env)
+            if method == 'DELETE':
+                for _id in payload:
+                    state.envs.pop(_id, None)
+                return None
+        if rest[0] in ('enable', 'disable') and method == 'PUT':
+            for _id in payload:
+                state.envs[_id]['status'] = 0 if rest[0] == 'enable' else 1
+            return None
+        if rest[0].isdigit() and method == 'GET':
+            return dict(state.envs[int(rest[0])])
+
+    elif resource == 'subscriptions':
+        if not rest:
+            if method == 'GET':
+                return [dict(s) for s in state.subs.values()]
+            if method == 'POST':
+                sub = dict(payload, id=state.new_id(), status=1, is_disabled=0)
+                state.subs[sub['id']] = sub
+                return dict(sub)
+            if method == 'PUT':
+                state.subs[payload['id']].update(payload)
+                return dict(state.subs[payload['id']])
+            if method == 'DELETE':
+                for _id in payload:
+                    state.subs.pop(_id, None)
+                return None
+        if rest[0] in ('run', 'stop', 'enable', 'disable') and method == 'PUT':
+            for _id in payload:
+                sub = state.subs[_id]
+                if rest[0] in ('enable', 'disable'):
+                    sub['is_disabled'] = 0 if rest[0] == 'enable' else 1
+            return None
+        if rest[0].isdigit():
+            sub = state.subs[int(rest[0])]
+            if len(rest) == 1:
+                return dict(sub)
+            if rest[1:] == ['log']:
+                return ''
+
+    elif resource == 'configs':
+        if rest == ['files']:
+            return [{'title': name, 'value': name} for name in state.configs]
+        if rest == ['detail']:
+            return state.configs.get(query.get('path'), '')
+        if rest == ['save'] and method == 'POST':
+            state.configs[payload['name']] = payload['content']
+            return None
+
+    elif resource == 'logs':
+        if not rest:
+            return [{'title': directory, 'key': directory, 'type': 'directory',
+                     'children': [{'title': f, 'key': f"{directory}/{f}", 'type': 'file', 'parent': directory,
+                                   'size': len(content)} for f, content in sorted(files.items())]}
+                    for directory, files in sorted(state.logs.items())]
+        if rest == ['detail']:
+            files = state.logs.get(query.get('path'), {})
+            if query.get('file') not in files:
+                raise _HTTPError(404, 'log not found')
+            return files[query['file']]
+
+    elif resource == 'system':
+        if rest == ['reload'] and method == 'PUT':
+            return None
+
+    raise _HTTPError(404, f"{method} {path} not found")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='本地模拟的青龙 OpenAPI 服务')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5700)
+    parser.add_argument('--latency', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0)
+    parser.add_argument('--run-time', type=float, default=0.5)
+    parser.add_argument('--clock-skew', type=float, default=0)
+    parser.add_argument('--seed-crons', type=int, default=0)
+    parser.add_argument('--seed-envs', type=int, default=0)
+    parser.add_argument('--seed-logs', type=int, default=0)
+    args = parser.parse_args()
+    server = MockQLServer(args.host, args.port, args.latency, args.error_rate, args.run_time, args.clock_skew)
+    server.seed(args.seed_crons, args.seed_envs, args.seed_logs)
+    print(f"{server.url}  client_id={CLIENT_ID}  client_secret={CLIENT_SECRET}", flush=True)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
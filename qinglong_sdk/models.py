@@ -0,0 +1,93 @@
+class Model:
+    """
+    接口返回值的类型化封装, 常用字段可以作为属性访问, 其他字段保存在 _extra 字典里
+    兼容 dict 的读取方式: obj['name'], obj.get('name')
+    """
+
+    __slots__ = ('_extra',)
+    _fields = ()
+    _field_set = frozenset()
+
+    def __init__(self, data: dict) -> None:
+        get = data.get
+        for field in self._fields:
+            object.__setattr__(self, field, get(field))
+        fields = self._field_set
+        self._extra = {k: v for k, v in data.items() if k not in fields} or None
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._field_set = frozenset(cls._fields)
+
+    def __getattr__(self, name: str):
+        # 只有 __slots__ 中没有的字段才会走到这里
+        extra = object.__getattribute__(self, '_extra')
+        if extra is not None and name in extra:
+            return extra[name]
+        raise AttributeError(f"{type(self).__name__} 没有字段: {name}")
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._field_set or (self._extra is not None and key in self._extra)
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default)
+
+    def to_dict(self) -> dict:
+        data = {field: getattr(self, field) for field in self._fields}
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Model):
+            return NotImplemented
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{field}={getattr(self, field)!r}" for field in self._fields[:3])
+        return f"{type(self).__name__}({fields})"
+
+
+class Cron(Model):
+    _fields = ('id', 'name', 'command', 'schedule', 'status', 'isDisabled', 'labels',
+               'last_execution_time', 'last_running_time', 'log_path', 'sub_id')
+    __slots__ = _fields
+
+
+class Env(Model):
+    _fields = ('id', 'name', 'value', 'remarks', 'status')
+    __slots__ = _fields
+
+
+class Subscription(Model):
+    _fields = ('id', 'name', 'type', 'url', 'alias', 'schedule_type', 'schedule', 'status', 'is_disabled')
+    __slots__ = _fields
+
+
+class CronView(Model):
+    _fields = ('id', 'name', 'filters', 'filterRelation', 'isDisabled')
+    __slots__ = _fields
+
+
+class LogEntry(Model):
+    _fields = ('directory', 'filename', 'time')
+    __slots__ = _fields
+
+
+def wrap(rt, model: type[Model]):
+    """
+    把接口返回值转换为 model, 列表接口返回 list[model]
+    """
+    if isinstance(rt, dict) and isinstance(rt.get('data'), list):
+        rt = rt['data']
+    if isinstance(rt, list):
+        return [model(item) for item in rt]
+    if isinstance(rt, dict):
+        return model(rt)
+    return rt
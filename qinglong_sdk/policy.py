@@ -0,0 +1,123 @@
+import random
+import threading
+import time
+
+from qinglong_sdk.exceptions import QLCircuitOpenError
+
+
+class RateLimiter:
+    """
+    令牌桶限流, 线程安全
+    """
+
+    def __init__(self, rate: float, burst: int = None) -> None:
+        """
+        rate: 每秒请求数
+        burst: 桶容量, 默认与 rate 相同
+        """
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class RetryPolicy:
+    """
+    重试策略: 指数退避 + 随机抖动
+    默认只重试幂等方法, 在连接失败、超时或 statuses 中的状态码时重试
+    """
+
+    def __init__(self, max_retries: int = 3,
+                 backoff: float = 0.5,
+                 max_backoff: float = 10,
+                 jitter: bool = True,
+                 methods: tuple = ('GET', 'HEAD', 'OPTIONS'),
+                 statuses: tuple = (429, 500, 502, 503, 504)) -> None:
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.methods = {m.upper() for m in methods}
+        self.statuses = set(statuses)
+
+    def retryable(self, method: str, attempt: int) -> bool:
+        return method.upper() in self.methods and attempt < self.max_retries
+
+    def delay(self, attempt: int, retry_after: str = None) -> float:
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff)
+        delay = min(self.backoff * 2 ** attempt, self.max_backoff)
+        if self.jitter:
+            # full jitter
+            delay = random.uniform(0, delay)
+        return delay
+
+
+class CircuitBreaker:
+    """
+    熔断器: 连续失败 failure_threshold 次后打开, reset_timeout 秒内的请求直接失败,
+    之后放行一个试探请求, 成功则关闭, 失败则继续打开
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def before(self, method: str = None, endpoint: str = None) -> bool:
+        """
+        熔断中时抛出 QLCircuitOpenError, 返回本次请求是否为试探请求
+        试探请求结束后必须调用 record_success / record_failure, 异常退出时至少调用 release
+        """
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return False
+            if state == 'half-open' and not self._probing:
+                self._probing = True
+                return True
+            raise QLCircuitOpenError(f"熔断中, 请求未发送：{method} {endpoint}", method, endpoint)
+
+    def release(self) -> None:
+        """
+        试探请求没有结果(例如被中断)时调用, 下一个请求重新试探
+        """
+        with self._lock:
+            self._probing = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._probing = False
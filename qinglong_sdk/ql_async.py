@@ -0,0 +1,168 @@
+import asyncio
+import json
+
+from qinglong_sdk.exceptions import QLAuthError, QLHTTPError
+from qinglong_sdk.ql_sdk import QLApi, TOKEN_PATH, _data_list
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+
+class AsyncQL(QLApi):
+    """
+    asyncio 版本的 QL, 接口与 QL 相同, 所有接口方法都需要 await
+    依赖 aiohttp: pip install qinglong-app-sdk[async]
+
+    async with AsyncQL(url, client_id, client_secret) as ql:
+        crons = await ql.crons_get_all()
+    """
+
+    def __init__(self, address: str, app_id: str, app_secret: str,
+                 pool_maxsize: int = 100,
+                 max_concurrency: int = 50,
+                 timeout: float = 30,
+                 headers: dict = None) -> None:
+        """
+        初始化, 不会立即登录, 第一次请求时自动登录
+        pool_maxsize: 连接池最大连接数
+        max_concurrency: 同时进行的最大请求数
+        timeout: 默认请求超时(秒)
+        headers: 额外的公共请求头
+        """
+        if aiohttp is None:
+            raise ImportError("AsyncQL 需要安装 aiohttp: pip install qinglong-app-sdk[async]")
+        self.auth = None
+        self.address = address
+        self.id = app_id
+        self.secret = app_secret
+        self.timeout = timeout
+        self.pool_maxsize = pool_maxsize
+        self.headers = {"content-type": "application/json"}
+        if headers:
+            self.headers.update(headers)
+        self.max_concurrency = max_concurrency
+        # 会话、信号量和锁都绑定在创建时的事件循环上, 在运行中的事件循环里按需创建
+        self.session = None
+        self._semaphore = None
+        self._login_lock = None
+        self._loop = None
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        # 换了事件循环(例如多次 asyncio.run), 旧的会话已经不能使用
+        self._loop = loop
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._login_lock = asyncio.Lock()
+        self.session = None
+
+    def _get_session(self) -> "aiohttp.ClientSession":
+        self._bind_loop()
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_maxsize)
+            self.session = aiohttp.ClientSession(connector=connector,
+                                                 headers=self.headers,
+                                                 timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self.session
+
+    async def close(self) -> None:
+        """
+        关闭连接池
+        """
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        self._get_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def _request(self, method: str, api_path: str,
+                       params_dict: dict = None,
+                       payload_dict: dict | str = None,
+                       cached: bool = True,
+                       **kwargs) -> dict:
+        self._bind_loop()
+        if self.auth is None and api_path != TOKEN_PATH:
+            async with self._login_lock:
+                if self.auth is None:
+                    await self.login()
+
+        api_url = f"{self.address}{api_path}"
+        if payload_dict and not isinstance(payload_dict, str):
+            payload = json.dumps(payload_dict)
+        else:
+            payload = payload_dict
+
+        if 'timeout' in kwargs:
+            kwargs['timeout'] = aiohttp.ClientTimeout(total=kwargs['timeout'])
+        for attempt in range(2):
+            auth = self.auth
+            headers = {"Authorization": auth} if auth else None
+            async with self._semaphore:
+                async with self._get_session().request(method, api_url, headers=headers,
+                                                       params=params_dict, data=payload, **kwargs) as response:
+                    if response.status == 401 and api_path != TOKEN_PATH and attempt == 0:
+                        # token 过期, 重新登录后重试一次
+                        expired = True
+                    elif response.status == 401 and api_path != TOKEN_PATH:
+                        raise QLAuthError(method, api_path, response.status, await response.text())
+                    elif response.status != 200:
+                        raise QLHTTPError(method, api_path, response.status, await response.text())
+                    else:
+                        expired = False
+                        rjson = await response.json(content_type=None)
+            if not expired:
+                break
+            async with self._login_lock:
+                # 其他协程可能已经刷新了 token
+                if self.auth == auth:
+                    await self.login()
+        return rjson.get('data', {})
+
+    async def login(self) -> bool:
+        """
+        登录
+        """
+        path = TOKEN_PATH
+        params_dict = {
+            'client_id': self.id,
+            'client_secret': self.secret
+        }
+        rjson = await self._get(path, params_dict)
+        self.auth = f"{rjson['token_type']} {rjson['token']}"
+        return True
+
+    async def crons_get_all(self,
+                            search_value: str = None,
+                            filters: list = None,
+                            filter_relation: str = 'and',
+                            sorter: str | tuple | dict = None,
+                            view_id: int = None,
+                            raw: bool = False):
+        path = f"/open/crons"
+        view = None
+        if view_id is not None:
+            views = _data_list(await self.crons_get_views(raw=True))
+            view = next((v for v in views if v['id'] == view_id), None)
+            if view is None:
+                raise KeyError(f"视图不存在: {view_id}")
+        params_dict = self._cron_query(search_value, filters, filter_relation, sorter, view)
+        return await self._get(path, params_dict or None)
+
+    async def env_add(self, name: str, value: str, remarks: str = ''):
+        path = f"/open/envs"
+        payload_dict = {
+            'name': name,
+            'value': value,
+            'remarks': remarks
+        }
+
+        rt = await self._post(path, [payload_dict])
+        return rt[0]
@@ -0,0 +1,115 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable
+
+from qinglong_sdk.ql_sdk import QL
+
+
+class FleetResult:
+    """
+    多面板调用结果
+    results: {面板名: 返回值}
+    errors: {面板名: 异常}
+    """
+
+    def __init__(self) -> None:
+        self.results = {}
+        self.errors = {}
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def __repr__(self) -> str:
+        return f"FleetResult(results={self.results!r}, errors={self.errors!r})"
+
+
+class QLFleet:
+    """
+    同时管理多个青龙面板, 在线程池中并行调用 QL 的方法
+
+    fleet = QLFleet({
+        'panel1': ('http://10.0.0.1:5700', client_id, client_secret),
+        'panel2': {'address': 'http://10.0.0.2:5700', 'app_id': client_id, 'app_secret': client_secret},
+    })
+    rt = fleet.run('crons_run', [1, 2])
+    """
+
+    def __init__(self, panels: dict | Iterable, max_workers: int = 16, **ql_kwargs) -> None:
+        """
+        panels: {面板名: (address, app_id, app_secret)} 或 {面板名: dict},
+                也可以是 (address, app_id, app_secret) 列表, 此时以 address 作为面板名
+        max_workers: 线程池大小
+        ql_kwargs: 创建 QL 时的其他参数
+        """
+        if not isinstance(panels, dict):
+            panels = {p[0] if not isinstance(p, dict) else p['address']: p for p in panels}
+        self.credentials = {}
+        for name, cred in panels.items():
+            if isinstance(cred, dict):
+                cred = (cred['address'], cred['app_id'], cred['app_secret'])
+            self.credentials[name] = tuple(cred)
+        self.ql_kwargs = ql_kwargs
+        self.clients = {}
+        self._locks = {name: threading.Lock() for name in self.credentials}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    @property
+    def names(self) -> list[str]:
+        return list(self.credentials)
+
+    def client(self, name: str) -> QL:
+        """
+        获取面板对应的 QL, 第一次请求时登录
+        """
+        with self._locks[name]:
+            if name not in self.clients:
+                self.clients[name] = QL(*self.credentials[name], **self.ql_kwargs)
+            return self.clients[name]
+
+    def login(self, panels: Iterable[str] = None) -> FleetResult:
+        """
+        并行登录所有(或指定)面板
+        """
+        return self.map(lambda ql: ql.login(), panels)
+
+    def map(self, func: Callable[[QL], object], panels: Iterable[str] = None) -> FleetResult:
+        """
+        对每个面板并行执行 func(ql)
+        """
+        names = self.names if panels is None else list(panels)
+        for name in names:
+            if name not in self.credentials:
+                raise KeyError(f"未知的面板: {name}")
+
+        def call(name):
+            return func(self.client(name))
+
+        futures = {name: self._executor.submit(call, name) for name in names}
+        result = FleetResult()
+        for name, future in futures.items():
+            try:
+                result.results[name] = future.result()
+            except Exception as e:
+                result.errors[name] = e
+        return result
+
+    def run(self, method: str, *args, panels: Iterable[str] = None, **kwargs) -> FleetResult:
+        """
+        对每个面板并行调用 QL 的方法, 如 fleet.run('env_update', _id, 'name', 'value')
+        """
+        if not callable(getattr(QL, method, None)):
+            raise AttributeError(f"QL 没有方法: {method}")
+        return self.map(lambda ql: getattr(ql, method)(*args, **kwargs), panels)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        for ql in self.clients.values():
+            ql.close()
+        self.clients.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -1,42 +1,75 @@
 import json
+import os
+import threading
 import time
 
-import requests
-from dotenv import load_dotenv
-from loguru import logger
+from qinglong_sdk.exceptions import QLAuthError, QLConnectionError, QLHTTPError
+from qinglong_sdk.metrics import Metrics
+from qinglong_sdk.models import Cron, CronView, Env, LogEntry, Model, Subscription, wrap
+from qinglong_sdk.policy import CircuitBreaker, RateLimiter, RetryPolicy
+from qinglong_sdk.response_cache import ResponseCache, _MISSING, resource_of
+from qinglong_sdk.singleflight import SingleFlight
+from qinglong_sdk.token_cache import TokenCache
 
-load_dotenv()
+_json_loads = None
 
 
-class QL:
-    def __init__(self, address: str, app_id: str, app_secret: str) -> None:
+def _loads(data: bytes):
+    """
+    安装了 orjson 时用它解析响应, 第一次调用时才导入
+    """
+    global _json_loads
+    if _json_loads is None:
+        try:
+            import orjson
+
+            _json_loads = orjson.loads
+        except ImportError:  # pragma: no cover
+            _json_loads = json.loads
+    return _json_loads(data)
+
+
+TOKEN_PATH = "/open/auth/token"
+CRON_STATUS_IDLE = 1
+CRON_FIELDS = ('schedule', 'name', 'sub_id', 'extra_schedules', 'task_before', 'task_after')
+
+
+def _data_list(rt) -> list:
+    """
+    新版青龙的列表接口返回 {'data': [...], 'total': n}, 旧版直接返回列表
+    """
+    if isinstance(rt, dict):
+        return rt.get('data') or []
+    return rt or []
+
+
+class QLApi:
+    """
+    青龙 OpenAPI 接口定义, 具体的请求由子类的 _request 实现
+    """
+
+    typed = False
+
+    def _wrap(self, rt, model: type[Model], raw: bool = False):
         """
-        初始化
+        typed 为 True 时把返回值转换为 model, raw=True 时返回原始数据
         """
-        self.auth = None
-        self.address = address
-        self.id = app_id
-        self.secret = app_secret
-        self.login()
+        if raw or not self.typed:
+            return rt
+        return wrap(rt, model)
 
     def _request(self, method: str, api_path: str,
                  params_dict: dict = None,
                  payload_dict: dict | str = None,
+                 cached: bool = True,
                  **kwargs) -> dict:
-        headers = {"Authorization": self.auth, "content-type": "application/json"}
-        api_url = f"{self.address}{api_path}"
-        if payload_dict and not isinstance(payload_dict, str):
-            payload = json.dumps(payload_dict)
-        else:
-            payload = payload_dict
+        raise NotImplementedError
 
-        response = requests.request(method, api_url, headers=headers, params=params_dict, data=payload, **kwargs)
-        if response.status_code != 200:
-            raise Exception(f"请求失败：{response.text}")
-        return response.json().get('data', {})
-
-    def _get(self, api_path: str, params_dict: dict = None, **kwargs) -> dict:
-        return self._request("GET", api_path, params_dict, **kwargs)
+    def _get(self, api_path: str, params_dict: dict = None, cached: bool = True, **kwargs) -> dict:
+        """
+        cached=False 时不读取响应缓存, 轮询状态时使用
+        """
+        return self._request("GET", api_path, params_dict, cached=cached, **kwargs)
 
     def _post(self, api_path: str, payload_dict: dict | str = None, **kwargs) -> dict:
         return self._request("POST", api_path, None, payload_dict, **kwargs)
@@ -47,28 +80,93 @@ class QL:
     def _put(self, api_path: str, payload_dict: dict | str = None, **kwargs) -> dict:
         return self._request("PUT", api_path, None, payload_dict, **kwargs)
 
-    def login(self) -> None:
+    @staticmethod
+    def _build_filters(filters: list) -> list[dict]:
         """
-        登录
+        [['name', 'Reg', 'test']] -> [{'property': 'name', 'operation': 'Reg', 'value': 'test'}]
+        已经是 dict 的条件原样保留
+        """
+        new_filters = []
+        for cond in filters:
+            if isinstance(cond, dict):
+                new_filters.append(cond)
+                continue
+            new_filters.append({
+                "property": cond[0],
+                "operation": cond[1],
+                "value": cond[2]
+            })
+        return new_filters
+
+    @classmethod
+    def _cron_query(cls, search_value: str = None,
+                    filters: list = None,
+                    filter_relation: str = 'and',
+                    sorter: str | tuple | dict = None,
+                    view: dict = None) -> dict:
+        """
+        生成 /open/crons 的查询参数, 同时指定视图和 filters 时结果需同时满足两者
+        青龙的查询只有一层过滤条件和一个 filterRelation, 两边都需要 or 关系时无法表示, 抛出 ValueError
+        """
+        params_dict = {}
+        if search_value:
+            params_dict['searchValue'] = search_value
+        query = {}
+        if view:
+            query = {'filters': view.get('filters') or [],
+                     'sorts': view.get('sorts') or [],
+                     'filterRelation': view.get('filterRelation') or 'and'}
+        if filters:
+            filters = cls._build_filters(filters)
+            view_filters = query.get('filters')
+            if not view_filters:
+                query.update(filters=filters, filterRelation=filter_relation)
+            else:
+                # 只有一个条件时关系无所谓, 否则两边都必须是 and 才能合并成一层
+                for group, relation in ((view_filters, query['filterRelation']), (filters, filter_relation)):
+                    if len(group) > 1 and relation != 'and':
+                        raise ValueError(f"视图 {view.get('name')} 与 filters 无法合并: 多个条件之间为 or 关系")
+                query.update(filters=view_filters + filters, filterRelation='and')
+        if query:
+            params_dict['queryString'] = json.dumps(query)
+        if sorter:
+            if isinstance(sorter, str):
+                sorter = (sorter[1:], 'DESC') if sorter.startswith('-') else (sorter, 'ASC')
+            if not isinstance(sorter, dict):
+                sorter = {'field': sorter[0], 'type': sorter[1].upper()}
+            params_dict['sorter'] = json.dumps(sorter)
+        return params_dict
+
+    def _find_view(self, view_id: int) -> dict:
+        for view in _data_list(self.crons_get_views(raw=True)):
+            if view['id'] == view_id:
+                return view
+        raise KeyError(f"视图不存在: {view_id}")
+
+    def crons_get_all(self,
+                      search_value: str = None,
+                      filters: list = None,
+                      filter_relation: str = 'and',
+                      sorter: str | tuple | dict = None,
+                      view_id: int = None,
+                      raw: bool = False):
+        """
+        search_value: 关键字搜索
+        filters: 过滤条件, 格式同 crons_add_view, 如 [['name', 'Reg', 'jd_'], ['status', 'In', [0, 1]]]
+        filter_relation: 过滤条件之间的关系, and / or
+        sorter: 排序字段, 'name' 升序, '-name' 降序, 也可以是 ('name', 'DESC')
+        view_id: 按已保存的视图过滤, 会先请求一次 crons_get_views; 同时指定 filters 时结果需同时满足两者
         """
-        path = f"/open/auth/token"
-        params_dict = {
-            'client_id': self.id,
-            'client_secret': self.secret
-        }
-        rjson = self._get(path, params_dict)
-        self.auth = f"{rjson['token_type']} {rjson['token']}"
-        return True
-
-    def crons_get_all(self):
         path = f"/open/crons"
-        rt = self._get(path)
-        return rt
+        view = self._find_view(view_id) if view_id is not None else None
+        params_dict = self._cron_query(search_value, filters, filter_relation, sorter, view)
+        rt = self._get(path, params_dict or None)
+        return self._wrap(rt, Cron, raw)
 
-    def crons_get_task_detail(self, cron_id: int):
+    def crons_get_task_detail(self, cron_id: int, raw: bool = False):
         path = f"/open/crons/{cron_id}"
         rt = self._get(path)
-        return rt
+        return self._wrap(rt, Cron, raw)
 
     def crons_add(self, command: str, schedule: str, name: str,
                   labels: list[str] = None,
@@ -174,10 +272,10 @@ class QL:
         rt = self._put(path, ids)
         return rt
 
-    def crons_get_logs(self, _id: int):
+    def crons_get_logs(self, _id: int, raw: bool = False):
         path = f"/open/crons/{_id}/logs"
         rt = self._get(path)
-        return rt
+        return self._wrap(rt, LogEntry, raw)
 
     def crons_get_log(self, _id: int):
         path = f"/open/crons/{_id}/log"
@@ -185,12 +283,12 @@ class QL:
         return rt
 
     # views
-    def crons_get_views(self):
+    def crons_get_views(self, raw: bool = False):
         path = f"/open/crons/views"
         rt = self._get(path)
-        return rt
+        return self._wrap(rt, CronView, raw)
 
-    def crons_add_view(self, view_name: str, filters: [[str]]):
+    def crons_add_view(self, view_name: str, filters: [[str]], filter_relation: str = 'and', sorts: list = None):
         path = f"/open/crons/views"
         """
         https://github.com/whyour/qinglong/blob/b733937691c8d48f531acea7f9325cead85b565e/src/pages/crontab/viewCreateModal.tsx#L30
@@ -205,17 +303,14 @@ class QL:
           { name: intl.get('不包含'), value: 'NotReg' },
           { name: intl.get('属于'), value: 'In', type: 'select' },
           { name: intl.get('不属于'), value: 'Nin', type: 'select' },
+
+        sorts: 排序, 如 [{'property': 'name', 'type': 'ASC'}]
         """
-        new_filters = []
-        for cond in filters:
-            new_filters.append({
-                "property": cond[0],
-                "operation": cond[1],
-                "value": cond[2]
-            })
         payload_dict = {"name": view_name,
-                        "filters": new_filters,
-                        "filterRelation": "and"}
+                        "filters": self._build_filters(filters),
+                        "filterRelation": filter_relation}
+        if sorts:
+            payload_dict['sorts'] = sorts
 
         rt = self._post(path, payload_dict)
         return rt
@@ -240,13 +335,13 @@ class QL:
         rt = self._get(path, params_dict)
         return rt
 
-    def subs_get_all(self):
+    def subs_get_all(self, raw: bool = False):
         """subscriptions
         https://github.com/whyour/qinglong/blob/develop/back/api/subscription.ts
         """
         path = f"/open/subscriptions"
         rt = self._get(path)
-        return rt
+        return self._wrap(rt, Subscription, raw)
 
     def subs_add(self,
                  type: str,
@@ -426,10 +521,10 @@ class QL:
         rt = self._put(path, sub_id)
         return rt
 
-    def subs_detail(self, sub_id: int):
+    def subs_detail(self, sub_id: int, raw: bool = False):
         path = f"/open/subscriptions/{sub_id}"
         rt = self._get(path)
-        return rt
+        return self._wrap(rt, Subscription, raw)
 
     def subs_get_log(self, sub_id: int):
         path = f"/open/subscriptions/{sub_id}/log"
@@ -469,7 +564,7 @@ class QL:
         rt = self._post(path, [payload_dict])
         return rt[0]
 
-    def env_get(self, _id: int = None, search_value: str = None):
+    def env_get(self, _id: int = None, search_value: str = None, raw: bool = False):
         if search_value:
             path = f"/open/envs"
             params_dict = {
@@ -483,7 +578,7 @@ class QL:
             path = f"/open/envs"
             rt = self._get(path)
 
-        return rt
+        return self._wrap(rt, Env, raw)
 
     def env_update(self, _id, name: str, value: str, remarks: str = ''):
         path = f"/open/envs"
@@ -532,7 +627,786 @@ class QL:
         rt = self._put(path)
         return rt
 
+
+class QL(QLApi):
+    """
+    线程安全: 同一个 QL 可以在多个线程中共用, token 的刷新有锁保护, 同时发起的相同 GET 请求只会发送一次
+    requests 在第一次请求时才导入, 创建 QL 不会产生网络请求
+    """
+
+    def __init__(self, address: str, app_id: str, app_secret: str,
+                 pool_connections: int = 10,
+                 pool_maxsize: int = 10,
+                 timeout: float | tuple = 30,
+                 headers: dict = None,
+                 token_cache: TokenCache | str | bool = None,
+                 cache: ResponseCache | bool = None,
+                 rate_limit: float | RateLimiter = None,
+                 retry: RetryPolicy | int = 3,
+                 circuit_breaker: CircuitBreaker | bool = None,
+                 typed: bool = False,
+                 metrics: Metrics | bool = None,
+                 coalesce: bool = True) -> None:
+        """
+        初始化, 不会立即登录, 第一次请求时自动登录
+        pool_connections: 连接池缓存的host数量
+        pool_maxsize: 每个host保持的最大连接数
+        timeout: 默认请求超时(秒), 可被单次请求的 timeout 参数覆盖
+        headers: 额外的公共请求头
+        token_cache: token 缓存, True 使用默认路径, 也可以传入缓存文件路径或 TokenCache
+        cache: GET 请求的响应缓存, True 使用默认配置, 写操作会自动清除对应资源的缓存
+        rate_limit: 每秒最大请求数, 也可以传入 RateLimiter
+        retry: 重试次数或 RetryPolicy, 默认只重试 GET; 0 或 None 不重试
+        circuit_breaker: 熔断器, True 使用默认配置
+        typed: 列表和详情接口返回 Cron/Env/Subscription 等对象而不是 dict, 单次调用可用 raw=True 取回原始数据
+        metrics: 请求统计与追踪钩子, True 使用默认配置, 通过 ql.stats() 查看
+        coalesce: 合并并发的相同 GET 请求, 所有等待的线程共享同一个返回值, 不要修改它;
+                  写请求完成后发起的 GET 不会合并到写请求之前开始的 GET 上
+        """
+        self.auth = None
+        self.expiration = None
+        self.address = address
+        self.id = app_id
+        self.secret = app_secret
+        self.timeout = timeout
+        self._session = None
+        self._session_args = (pool_connections, pool_maxsize, headers)
+        self._session_lock = threading.Lock()
+        if token_cache is True:
+            token_cache = TokenCache()
+        elif isinstance(token_cache, str):
+            token_cache = TokenCache(token_cache)
+        self.token_cache = token_cache or None
+        self.cache = ResponseCache() if cache is True else (cache or None)
+        if isinstance(rate_limit, (int, float)):
+            rate_limit = RateLimiter(rate_limit)
+        self.rate_limiter = rate_limit or None
+        if isinstance(retry, int):
+            retry = RetryPolicy(max_retries=retry)
+        self.retry = retry or RetryPolicy(max_retries=0)
+        self.circuit_breaker = CircuitBreaker() if circuit_breaker is True else (circuit_breaker or None)
+        self.typed = typed
+        self.metrics = Metrics() if metrics is True else (metrics or None)
+        self._auth_lock = threading.RLock()
+        self._inflight = SingleFlight() if coalesce else None
+        # {资源: 已完成的写请求数}, 用于区分写请求前后发起的 GET
+        self._generations = {}
+        self._generation_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, prefix: str = 'QL_', dotenv: bool = True, **kwargs) -> 'QL':
+        """
+        从环境变量创建 QL: {prefix}URL(默认 http://127.0.0.1:5700)、{prefix}CLIENT_ID、{prefix}CLIENT_SECRET
+        dotenv: 安装了 python-dotenv 时先加载 .env, 已有的环境变量不会被覆盖
+        不会登录, 第一次请求时才登录
+        """
+        if dotenv:
+            try:
+                from dotenv import load_dotenv
+            except ImportError:
+                pass
+            else:
+                load_dotenv()
+        address = os.getenv(f'{prefix}URL', 'http://127.0.0.1:5700')
+        return cls(address, os.getenv(f'{prefix}CLIENT_ID'), os.getenv(f'{prefix}CLIENT_SECRET'), **kwargs)
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self._new_session(*self._session_args)
+        return self._session
+
+    @staticmethod
+    def _new_session(pool_connections: int, pool_maxsize: int, headers: dict = None):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update({"content-type": "application/json", "Connection": "keep-alive"})
+        if headers:
+            session.headers.update(headers)
+        return session
+
+    def close(self) -> None:
+        """
+        关闭连接池
+        """
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def invalidate(self, api_path: str = None) -> None:
+        """
+        清除响应缓存, api_path 为空时清除全部, 否则清除该路径所属资源的缓存
+        """
+        if self.cache:
+            self.cache.invalidate(api_path)
+
+    def stats(self) -> dict:
+        """
+        各接口的请求统计, 未开启 metrics 时返回空 dict
+        """
+        return self.metrics.stats() if self.metrics else {}
+
+    def _request(self, method: str, api_path: str,
+                 params_dict: dict = None,
+                 payload_dict: dict | str = None,
+                 cached: bool = True,
+                 **kwargs) -> dict:
+        api_url = f"{self.address}{api_path}"
+        if payload_dict and not isinstance(payload_dict, str):
+            payload = json.dumps(payload_dict)
+        else:
+            payload = payload_dict
+
+        cache_key = None
+        if self.cache and api_path != TOKEN_PATH:
+            if method != "GET":
+                self.cache.invalidate(api_path)
+            elif self.cache.ttl_of(api_path) > 0:
+                cache_key = self.cache.key(api_path, params_dict)
+                rt = self.cache.get(cache_key) if cached else _MISSING
+                if rt is not _MISSING:
+                    return rt
+
+        kwargs.setdefault('timeout', self.timeout)
+        resource = resource_of(api_path)
+        if method != "GET":
+            try:
+                rt = self._fetch(method, api_path, api_url, params_dict, payload, **kwargs)
+            finally:
+                with self._generation_lock:
+                    self._generations[resource] = self._generations.get(resource, 0) + 1
+        else:
+            generation = self._generations.get(resource, 0)
+            if self._inflight is not None and api_path != TOKEN_PATH:
+                rt = self._inflight.do(ResponseCache.key(api_path, params_dict) + (generation,),
+                                       self._fetch, method, api_path, api_url, params_dict, payload, **kwargs)
+            else:
+                rt = self._fetch(method, api_path, api_url, params_dict, payload, **kwargs)
+        # 请求期间有写请求完成时, 结果可能是写之前的数据, 不缓存
+        if cache_key is not None and self._generations.get(resource, 0) == generation:
+            self.cache.set(cache_key, rt)
+        elif self.cache and method != "GET":
+            # 请求期间其他线程可能写入了旧数据
+            self.cache.invalidate(api_path)
+        return rt
+
+    def _fetch(self, method: str, api_path: str, api_url: str,
+               params_dict: dict = None,
+               payload: str = None,
+               **kwargs):
+        if api_path != TOKEN_PATH:
+            self._ensure_login()
+        auth = self.auth
+        response = self._send(method, api_path, api_url, params_dict, payload, **kwargs)
+        if response.status_code == 401 and api_path != TOKEN_PATH:
+            # token 过期, 重新登录后重试一次
+            self._refresh_auth(auth)
+            response = self._send(method, api_path, api_url, params_dict, payload, **kwargs)
+            if response.status_code == 401:
+                raise QLAuthError(method, api_path, response.status_code, response.text)
+        if response.status_code != 200:
+            raise QLHTTPError(method, api_path, response.status_code, response.text)
+        return _loads(response.content).get('data', {})
+
+    def _send(self, method: str, api_path: str, api_url: str,
+              params_dict: dict = None,
+              payload: str = None,
+              **kwargs):
+        """
+        发送请求, 处理限流、重试和熔断
+        """
+        import requests
+
+        session = self.session
+        metrics = self.metrics
+        attempt = 0
+        breaker = self.circuit_breaker
+        while True:
+            probe = breaker.before(method, api_path) if breaker else False
+            try:
+                if self.rate_limiter:
+                    self.rate_limiter.acquire()
+                if metrics:
+                    metrics.request_started(method, api_path, len(payload.encode()) if payload else 0)
+                    start = time.perf_counter()
+                try:
+                    headers = {"Authorization": self.auth} if self.auth and api_path != TOKEN_PATH else None
+                    response = session.request(method, api_url, params=params_dict, data=payload,
+                                               headers=headers, **kwargs)
+                except requests.RequestException as e:
+                    # 包括 ChunkedEncodingError 等, 都要记录失败, 否则熔断器的试探请求一直不结束
+                    if breaker:
+                        breaker.record_failure()
+                        probe = False
+                    if metrics:
+                        metrics.request_failed(method, api_path, e, time.perf_counter() - start)
+                    if not isinstance(e, (requests.ConnectionError, requests.Timeout)) \
+                            or not self.retry.retryable(method, attempt):
+                        raise QLConnectionError(f"连接失败：{method} {api_path} {e}", method, api_path) from e
+                    if metrics:
+                        metrics.retried(method, api_path)
+                    time.sleep(self.retry.delay(attempt))
+                    attempt += 1
+                    continue
+
+                # 先记录熔断器结果, metrics 钩子出错也不影响它
+                if breaker:
+                    if response.status_code >= 500:
+                        breaker.record_failure()
+                    else:
+                        breaker.record_success()
+                    probe = False
+                if metrics:
+                    metrics.request_finished(method, api_path, response.status_code,
+                                             time.perf_counter() - start, len(response.content))
+                if response.status_code in self.retry.statuses and self.retry.retryable(method, attempt):
+                    if metrics:
+                        metrics.retried(method, api_path)
+                    time.sleep(self.retry.delay(attempt, response.headers.get('Retry-After')))
+                    attempt += 1
+                    continue
+                return response
+            finally:
+                # 试探请求没有结果就异常退出(例如 KeyboardInterrupt)时释放, 否则熔断器会一直拒绝请求
+                if probe:
+                    breaker.release()
+
+    @property
+    def _token_key(self) -> str:
+        return TokenCache.key(self.address, self.id)
+
+    def _set_auth(self, auth: str, expiration: float) -> None:
+        self.expiration = expiration
+        self.auth = auth
+
+    def _token_valid(self) -> bool:
+        return self.auth is not None and (self.expiration is None or self.expiration > time.time())
+
+    def _ensure_login(self) -> None:
+        if self._token_valid():
+            return
+        with self._auth_lock:
+            if self._token_valid():
+                return
+            cached = self.token_cache.get(self._token_key) if self.token_cache else None
+            if cached:
+                self._set_auth(*cached)
+            else:
+                self.login()
+
+    def _refresh_auth(self, stale_auth: str) -> None:
+        """
+        收到 401 后重新登录; 多个线程同时收到 401 时只有第一个线程登录
+        """
+        with self._auth_lock:
+            if self.auth == stale_auth:
+                self.login()
+
+    def login(self) -> bool:
+        """
+        登录
+        """
+        path = TOKEN_PATH
+        params_dict = {
+            'client_id': self.id,
+            'client_secret': self.secret
+        }
+        with self._auth_lock:
+            rjson = self._get(path, params_dict)
+            expiration = rjson.get('expiration') or time.time() + 3600
+            self._set_auth(f"{rjson['token_type']} {rjson['token']}", expiration)
+            if self.token_cache:
+                self.token_cache.set(self._token_key, self.auth, expiration)
+        return True
+
+    def iter_crons(self, page_size: int = 100, search_value: str = None, prefetch: bool = True, raw: bool = False,
+                   filters: list = None,
+                   filter_relation: str = 'and',
+                   sorter: str | tuple | dict = None,
+                   view_id: int = None):
+        """
+        分页遍历定时任务, 内存占用只与 page_size 有关, 可以随时 break
+        prefetch: 处理当前页时在后台线程获取下一页
+        filters/filter_relation/sorter/view_id: 同 crons_get_all
+        """
+        view = self._find_view(view_id) if view_id is not None else None
+        params_dict = self._cron_query(search_value, filters, filter_relation, sorter, view)
+        yield from self._iter_pages("/open/crons", params_dict, page_size, prefetch, Cron, raw)
+
+    def iter_envs(self, page_size: int = 100, search_value: str = None, prefetch: bool = True, raw: bool = False):
+        """
+        分页遍历环境变量, 旧版青龙不支持分页时退化为一次获取全部
+        """
+        params_dict = {'searchValue': search_value} if search_value else {}
+        yield from self._iter_pages("/open/envs", params_dict, page_size, prefetch, Env, raw)
+
+    def _iter_pages(self, path: str, params_dict: dict, page_size: int, prefetch: bool,
+                    model: type[Model], raw: bool):
+        from concurrent.futures import ThreadPoolExecutor
+
+        def fetch(page):
+            return self._get(path, {**params_dict, 'page': page, 'size': page_size})
+
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        try:
+            page = 1
+            rt = fetch(page)
+            seen = 0
+            while True:
+                if not isinstance(rt, dict):
+                    # 接口不支持分页, 直接返回了全部数据
+                    items, total = rt or [], None
+                else:
+                    items, total = rt.get('data') or [], rt.get('total')
+                seen += len(items)
+                more = total is not None and bool(items) and seen < total
+                future = executor.submit(fetch, page + 1) if more and executor else None
+                items = self._wrap(items, model, raw)
+                yield from items
+                if not more:
+                    return
+                page += 1
+                rt = future.result() if future else fetch(page)
+        finally:
+            if executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def crons_tail_log(self, cron_id: int,
+                       min_interval: float = 1,
+                       max_interval: float = 10,
+                       stop_when_idle: bool = True):
+        """
+        持续获取任务日志, 每次只 yield 新增的行, 任务空闲后结束
+        青龙只提供完整日志接口, 每次轮询仍会下载整个日志, 这里只保存已读长度和末尾的哈希,
+        内存占用与日志大小无关; 日志被截断或重新开始时从头输出
+        轮询间隔在 min_interval 与 max_interval 之间自适应: 有新内容时重置, 否则翻倍
+        """
+        offset = 0
+        anchor = None
+        partial = ''
+        interval = min_interval
+        while True:
+            # 不能读取响应缓存, 否则缓存期内看不到新日志
+            idle = (stop_when_idle
+                    and self._get(f"/open/crons/{cron_id}", cached=False).get('status') == CRON_STATUS_IDLE)
+            text = self._get(f"/open/crons/{cron_id}/log", cached=False) or ''
+            if not isinstance(text, str):
+                text = str(text)
+            if len(text) < offset or anchor != self._log_anchor(text, offset):
+                offset = 0
+                partial = ''
+            chunk = text[offset:]
+            offset = len(text)
+            anchor = self._log_anchor(text, offset)
+            del text
+
+            if chunk:
+                interval = min_interval
+                lines = (partial + chunk).split('\n')
+                partial = lines.pop()
+                yield from lines
+            else:
+                interval = min(interval * 2, max_interval)
+
+            if idle:
+                if partial:
+                    yield partial
+                return
+            time.sleep(interval)
+
+    @staticmethod
+    def _log_anchor(text: str, offset: int) -> str | None:
+        if offset == 0:
+            return None
+        import hashlib
+
+        return hashlib.md5(text[max(0, offset - 256):offset].encode()).hexdigest()
+
+    def crons_run_and_wait(self, ids: int | list[int],
+                           timeout: float = None,
+                           max_concurrent: int = None,
+                           min_interval: float = 1,
+                           max_interval: float = 10) -> dict:
+        """
+        运行任务并等待结束, 每轮只调用一次 crons_get_all 查询所有任务的状态
+        ids: 任务id
+        timeout: 总超时时间(秒), 超时后不再等待
+        max_concurrent: 同时运行的任务数, 空出位置后再触发剩下的任务
+        min_interval/max_interval: 轮询间隔, 没有任务结束时翻倍
+        返回 {id: {'status': 'finished' | 'missing' | 'timeout' | 'pending', 'duration': 秒}}
+        任务在运行期间被删除时为 missing
+        """
+        ids = [ids] if isinstance(ids, int) else list(ids)
+        max_concurrent = max_concurrent or len(ids)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        queue = list(ids)
+        running = {}
+        result = {}
+        interval = min_interval
+        while queue or running:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            batch = queue[:max_concurrent - len(running)]
+            if batch:
+                del queue[:len(batch)]
+                running.update(self._run_tracked(batch))
+
+            time.sleep(interval if deadline is None else max(0, min(interval, deadline - time.monotonic())))
+
+            finished = self._poll_running(running)
+            for _id, state in finished.items():
+                del running[_id]
+                result[_id] = state
+            interval = min_interval if finished else min(interval * 2, max_interval)
+
+        for _id, state in running.items():
+            result[_id] = {'status': 'timeout', 'duration': time.time() - state['started']}
+        for _id in queue:
+            result[_id] = {'status': 'pending', 'duration': None}
+        return result
+
+    def crons_run_dag(self, ids: list[int] = None, spec: dict = None, parallelism: int = 4,
+                      timeout: float = None, min_interval: float = 1, max_interval: float = 10) -> dict:
+        """
+        按依赖关系运行任务, 依赖都完成后才触发, 最多同时运行 parallelism 个, 关键路径上的任务优先
+        ids: 按 task_before/task_after 运行这些任务, 默认为所有有依赖关系的任务
+        spec: 直接指定依赖关系 {cron_id: [依赖的 cron_id]}, 此时忽略 ids
+        存在循环依赖时抛出 ValueError
+        返回 {cron_id: {'status': 'finished' | 'failed' | 'skipped' | 'timeout' | 'pending',
+                        'started', 'finished', 'duration', 'error'}}
+        """
+        from qinglong_sdk.dag import CronDAG
+
+        crons = _data_list(self.crons_get_all(raw=True))
+        if spec is not None:
+            durations = {cron['id']: cron.get('last_running_time') for cron in crons}
+            dag = CronDAG(spec, durations)
+        else:
+            dag = CronDAG.from_crons(crons, ids)
+        return dag.run(self, parallelism=parallelism, timeout=timeout,
+                       min_interval=min_interval, max_interval=max_interval)
+
+    def _run_tracked(self, ids: list[int]) -> dict:
+        """
+        触发任务, 返回 _poll_running 需要的状态 {id: {'started', 'seen_running', 'last_execution'}}
+        触发前记录 last_execution_time, 之后它有变化就说明已经运行过, 不比较本机和面板的时间
+        """
+        before = {cron['id']: cron.get('last_execution_time')
+                  for cron in _data_list(self._get("/open/crons", cached=False))}
+        self.crons_run(ids)
+        now = time.time()
+        return {_id: {'started': now, 'seen_running': False, 'last_execution': before.get(_id)} for _id in ids}
+
+    def _poll_running(self, running: dict) -> dict:
+        """
+        用一次 crons_get_all(不读取响应缓存)检查 running 中的任务是否已结束
+        running: _run_tracked 的返回值, 会更新其中的 seen_running
+        返回已结束的任务 {id: {'status': 'finished' | 'missing', 'duration': 秒}}, 列表中已不存在的任务为 missing
+        """
+        status = {cron['id']: cron for cron in _data_list(self._get("/open/crons", cached=False))
+                  if cron['id'] in running}
+        finished = {}
+        for _id, state in running.items():
+            cron = status.get(_id)
+            if cron is None:
+                finished[_id] = {'status': 'missing', 'duration': time.time() - state['started']}
+                continue
+            if cron.get('status') != CRON_STATUS_IDLE:
+                state['seen_running'] = True
+                continue
+            if state['seen_running'] or cron.get('last_execution_time') != state['last_execution']:
+                duration = cron.get('last_running_time')
+                if duration is None:
+                    duration = time.time() - state['started']
+                finished[_id] = {'status': 'finished', 'duration': duration}
+        return finished
+
+    def logs_sync(self, dest_dir: str, max_workers: int = 8, compress: bool = False) -> dict:
+        """
+        把面板上的日志增量同步到 dest_dir, 已同步的文件记录在 dest_dir/.manifest.json
+        只下载新增或变化的文件, 在线程池中并行下载, 分块写入临时文件后原子替换, compress=True 时保存为 .gz
+        返回 {'downloaded': [...], 'unchanged': [...], 'skipped': n, 'failed': {文件: 异常}}, 路径不在 dest_dir 内的文件不下载, 记为失败
+        """
+        from qinglong_sdk.log_archive import sync_logs
+
+        return sync_logs(self, dest_dir, max_workers=max_workers, compress=compress)
+
+    def crons_schedule_report(self, hours: float = 24, threshold: int = 2, start=None) -> dict:
+        """
+        根据 crons_get_all 计算接下来 hours 小时内每分钟执行的任务数和冲突
+        返回 {'histogram': {分钟: 次数}, 'peak': (分钟, 次数), 'collisions': [{'minute', 'count', 'ids'}],
+              'invalid': {cron_id: 错误}}
+        """
+        from qinglong_sdk.cron_schedule import schedule_report
+
+        return schedule_report(_data_list(self.crons_get_all(raw=True)), start=start, hours=hours, threshold=threshold)
+
+    def crons_stagger(self, window: int = 30, threshold: int = 2, ids: list[int] = None,
+                      dry_run: bool = False, max_workers: int = 8) -> dict:
+        """
+        把同一分钟执行的任务分散到之后的 window 分钟内, 削平面板的负载峰值
+        threshold: 同一分钟执行的任务达到这个数量才移动
+        ids: 只移动这些任务
+        dry_run: 只计算计划, 不提交
+        返回 {'update': [{'id', 'name', 'old', 'new'}], 'failed': {cron_id: 异常}}
+        青龙没有批量更新接口, 更新在线程池中并行提交
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        from qinglong_sdk.cron_schedule import plan_stagger
+
+        crons = _data_list(self.crons_get_all(raw=True))
+        plan = plan_stagger(crons, window=window, threshold=threshold, ids=ids)
+        report = {'update': plan, 'failed': {}}
+        if dry_run or not plan:
+            return report
+
+        by_id = {cron['id']: cron for cron in crons}
+
+        def update(item):
+            cron = by_id[item['id']]
+            payload = {k: cron.get(k) for k in CRON_FIELDS}
+            payload.update(_id=cron['id'], command=cron['command'], labels=cron.get('labels'), schedule=item['new'])
+            return self.crons_update(**payload)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(plan)))) as executor:
+            futures = {item['id']: executor.submit(update, item) for item in plan}
+            for _id, future in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    report['failed'][_id] = e
+        return report
+
+    def watch(self, resources=('crons', 'envs', 'subs'), interval: float = 5, max_interval: float = 60,
+              on_event=None, **kwargs):
+        """
+        监视 crons / envs / subs 的变化, 返回 Watcher, 可以迭代得到事件, 也可以 start() 后通过 on_event 回调
+        事件类型: added / removed / changed / started / queued / finished / enabled / disabled
+        没有变化时轮询间隔逐步加大到 max_interval
+        快照只保存每个条目的摘要, 需要 changed 事件的 old/changes 时传 details=True(保存完整条目)
+        for event in ql.watch(['crons'], details=True):
+            print(event.type, event.id, event.changes)
+        """
+        from qinglong_sdk.watch import Watcher
+
+        return Watcher(self, resources, interval=interval, max_interval=max_interval, on_event=on_event, **kwargs)
+
+    def export_snapshot(self, path: str, max_workers: int = 8) -> dict:
+        """
+        并行获取定时任务、视图、环境变量、订阅和配置文件, 保存为 gzip 压缩的 JSON Lines 快照, 返回 manifest
+        """
+        from qinglong_sdk.snapshot import export_snapshot
+
+        return export_snapshot(self, path, max_workers=max_workers)
+
+    def import_snapshot(self, path: str, resources: tuple = None, max_workers: int = 16,
+                        dry_run: bool = False) -> dict:
+        """
+        把 export_snapshot 保存的快照恢复到面板, 已存在的条目不会重复创建
+        resources: 要恢复的资源, 默认全部: configs / envs / subs / crons / views
+        定时任务的 sub_id、task_before、task_after 会换成新面板上的 id
+        返回 {资源: {'added': n, 'existing': n}, 'failed': {描述: 异常}}
+        """
+        from qinglong_sdk.snapshot import RESOURCES, import_snapshot
+
+        return import_snapshot(self, path, resources=resources or RESOURCES, max_workers=max_workers,
+                               dry_run=dry_run)
+
+    def cfg_edit(self, config_name: str = 'config.sh'):
+        """
+        返回配置文件编辑会话, 在本地修改 export KEY=... 行, 有变化时才保存, 保存前检查并发修改
+        with ql.cfg_edit('config.sh') as cfg:
+            cfg.set('TZ', 'Asia/Shanghai')
+            cfg.unset('OLD_KEY')
+        """
+        from qinglong_sdk.config_edit import ConfigSession
+
+        return ConfigSession(self, config_name)
+
+    def cfg_apply(self, edits: dict, config_names: str | list[str] = 'config.sh',
+                  max_workers: int = 8, dry_run: bool = False) -> dict:
+        """
+        把相同的修改并行应用到多个配置文件
+        edits: {KEY: value}, value 为 None 时删除该变量
+        返回 {'saved': [...], 'unchanged': [...], 'failed': {文件: 异常}}
+        """
+        from qinglong_sdk.config_edit import apply_config_edits
+
+        if isinstance(config_names, str):
+            config_names = [config_names]
+        return apply_config_edits(self, edits, config_names, max_workers=max_workers, dry_run=dry_run)
+
+    def crons_apply(self, spec: list[dict], prune: bool = False, dry_run: bool = False) -> dict:
+        """
+        把定时任务调整为 spec, 按 command 匹配 crons_get_all 的结果, 只提交有变化的部分
+        spec: [{'command': ..., 'schedule': ..., 'name': ..., 'labels': [...], 'extra_schedules': [...],
+                'task_before': [...], 'task_after': [...], 'sub_id': ..., 'enabled': True}]
+              除 command/schedule/name 外都可省略, 省略的字段保持不变
+        prune: 删除不在 spec 中的任务, 以及 command 相同的多余任务
+        dry_run: 只计算变更, 不提交
+        返回 {'add': [...], 'update': [...], 'delete': [...], 'enable': [...], 'disable': [...],
+              'add_labels': {labels: [ids]}, 'remove_labels': {labels: [ids]}, 'unchanged': n,
+              'duplicates': [ids]}
+        多个任务的 command 相同时只调整第一个, 其余的记在 duplicates 中, prune=True 时删除
+        启用、禁用、删除、标签按相同参数合并为批量请求
+        """
+        groups = {}
+        for cron in _data_list(self.crons_get_all(raw=True)):
+            groups.setdefault(cron['command'], []).append(cron)
+        current = {command: crons[0] for command, crons in groups.items()}
+
+        report = {'add': [], 'update': [], 'delete': [], 'enable': [], 'disable': [],
+                  'add_labels': {}, 'remove_labels': {}, 'unchanged': 0,
+                  'duplicates': [cron['id'] for crons in groups.values() for cron in crons[1:]]}
+        add_disabled = []
+        seen = set()
+        for item in spec:
+            seen.add(item['command'])
+            cron = current.get(item['command'])
+            if cron is None:
+                report['add'].append({k: item.get(k) for k in ('command', 'labels') + CRON_FIELDS})
+                add_disabled.append(item.get('enabled') is False)
+                continue
+
+            changed = False
+            labels = set(cron.get('labels') or [])
+            if any(k in item and (item[k] or None) != (cron.get(k) or None) for k in CRON_FIELDS):
+                update = {k: item.get(k, cron.get(k)) for k in CRON_FIELDS}
+                update.update(_id=cron['id'], command=cron['command'], labels=item.get('labels', cron.get('labels')))
+                report['update'].append(update)
+                changed = True
+            elif 'labels' in item and set(item['labels'] or []) != labels:
+                to_add = tuple(sorted(set(item['labels'] or []) - labels))
+                to_remove = tuple(sorted(labels - set(item['labels'] or [])))
+                if to_add:
+                    report['add_labels'].setdefault(to_add, []).append(cron['id'])
+                if to_remove:
+                    report['remove_labels'].setdefault(to_remove, []).append(cron['id'])
+                changed = True
+
+            enabled = cron.get('isDisabled') != 1
+            if item.get('enabled', enabled) != enabled:
+                report['enable' if item['enabled'] else 'disable'].append(cron['id'])
+                changed = True
+            if not changed:
+                report['unchanged'] += 1
+
+        if prune:
+            report['delete'] = [cron['id'] for command, crons in groups.items()
+                                for cron in (crons if command not in seen else crons[1:])]
+
+        if dry_run:
+            return report
+        if report['delete']:
+            self.crons_delete(report['delete'])
+        for cron, disabled in zip(report['add'], add_disabled):
+            rt = self.crons_add(**cron)
+            if disabled:
+                report['disable'].append(rt['id'])
+        for cron in report['update']:
+            self.crons_update(**cron)
+        for labels, ids in report['add_labels'].items():
+            self.crons_add_labels(ids, list(labels))
+        for labels, ids in report['remove_labels'].items():
+            self.crons_remove_labels(ids, list(labels))
+        if report['enable']:
+            self.crons_enable(report['enable'])
+        if report['disable']:
+            self.crons_disable(report['disable'])
+        return report
+
+    def env_sync(self, desired: list[dict], prune: bool = False, dry_run: bool = False) -> dict:
+        """
+        把环境变量同步为 desired, 只获取一次当前环境变量, 按最少的请求提交变更
+        desired: [{'name': ..., 'value': ..., 'remarks': ..., 'enabled': True}], remarks/enabled 可省略
+        prune: 删除 desired 中出现过的变量名下没有匹配到的多余变量
+        dry_run: 只计算变更, 不提交
+        返回 {'add': [...], 'update': [...], 'delete': [...], 'enable': [...], 'disable': [...], 'unchanged': n}
+
+        同名变量可以有多个, 先按 (name, value) 匹配, 剩下的再按 name 依次匹配并更新.
+        新增、删除、启用、禁用各一次批量请求, 青龙没有批量更新接口, 更新逐个提交
+        """
+        current = self.env_get(raw=True) or []
+        by_value = {}
+        for env in current:
+            by_value.setdefault((env['name'], env['value']), []).append(env)
+
+        pairs = []
+        pending = []
+        for item in desired:
+            envs = by_value.get((item['name'], item['value']))
+            if envs:
+                pairs.append((item, envs.pop(0)))
+            else:
+                pending.append(item)
+
+        used = {env['id'] for _, env in pairs}
+        by_name = {}
+        for env in current:
+            if env['id'] not in used:
+                by_name.setdefault(env['name'], []).append(env)
+
+        report = {'add': [], 'update': [], 'delete': [], 'enable': [], 'disable': [], 'unchanged': 0}
+        add_disabled = []
+        for item in pending:
+            envs = by_name.get(item['name'])
+            if envs:
+                pairs.append((item, envs.pop(0)))
+            else:
+                report['add'].append({'name': item['name'], 'value': item['value'],
+                                      'remarks': item.get('remarks', '')})
+                add_disabled.append(item.get('enabled') is False)
+
+        for item, env in pairs:
+            remarks = item.get('remarks', env.get('remarks') or '')
+            changed = False
+            if item['value'] != env['value'] or remarks != (env.get('remarks') or ''):
+                report['update'].append({'id': env['id'], 'name': item['name'],
+                                         'value': item['value'], 'remarks': remarks})
+                changed = True
+            enabled = env.get('status') != 1
+            if item.get('enabled', enabled) != enabled:
+                report['enable' if item['enabled'] else 'disable'].append(env['id'])
+                changed = True
+            if not changed:
+                report['unchanged'] += 1
+
+        if prune:
+            names = {item['name'] for item in desired}
+            report['delete'] = [env['id'] for name in names for env in by_name.get(name, [])]
+
+        if dry_run:
+            return report
+        if report['delete']:
+            self.env_delete(report['delete'])
+        if report['add']:
+            added = self._post("/open/envs", report['add'])
+            report['disable'].extend(env['id'] for env, disabled in zip(added, add_disabled) if disabled)
+        for env in report['update']:
+            self.env_update(env['id'], env['name'], env['value'], env['remarks'])
+        if report['enable']:
+            self.env_enable(report['enable'])
+        if report['disable']:
+            self.env_disable(report['disable'])
+        return report
+
     def test(self):
+        from loguru import logger
+
         self.crons_get_views()
         rt = self.crons_add_view('test', [['name', 'Reg', 'test']])
         self.crons_del_view(rt['id'])
@@ -554,14 +1428,11 @@ class QL:
         rt = self.crons_update(**task_test)
 
         assert rt['name'] == 'test2'
-        self.crons_run(cron_id)
         self.crons_add_labels(ids=[cron_id], tags='test')
         self.crons_remove_labels(ids=[cron_id], tags='test')
 
-        while rt := self.crons_get_task_detail(cron_id):
-            status = rt['status']
-            if status == 1:
-                break
+        rt = self.crons_run_and_wait(cron_id, timeout=60)
+        logger.info(rt)
 
         self.crons_disable(ids=cron_id)
         self.crons_enable(ids=cron_id)
@@ -662,10 +1533,5 @@ class QL:
 
 
 if __name__ == "__main__":
-    import os
-
-    url = "http://127.0.0.1:5700"
-    client_id = os.getenv("QL_CLIENT_ID")
-    client_secret = os.getenv("QL_CLIENT_SECRET")
-    ql = QL(url, client_id, client_secret)
+    ql = QL.from_env()
     ql.test()
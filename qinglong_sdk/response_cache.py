@@ -0,0 +1,89 @@
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_TTLS = {
+    '/open/crons': 10,
+    '/open/envs': 10,
+    '/open/subscriptions': 10,
+    '/open/configs': 30,
+}
+
+_MISSING = object()
+
+
+def resource_of(api_path: str) -> str:
+    """
+    /open/crons/1/log -> /open/crons
+    """
+    return '/'.join(api_path.split('/')[:3])
+
+
+class ResponseCache:
+    """
+    GET 请求的 TTL + LRU 缓存
+    缓存的是解析后的对象, 调用方不要修改返回值
+    """
+
+    def __init__(self, ttls: dict = None, maxsize: int = 256) -> None:
+        """
+        ttls: {路径前缀: 秒}, 按最长前缀匹配, 没有匹配的路径不缓存, 默认见 DEFAULT_TTLS
+        maxsize: 最多缓存的条目数
+        """
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def ttl_of(self, api_path: str) -> float:
+        prefixes = [p for p in self.ttls if api_path == p or api_path.startswith(p.rstrip('/') + '/')]
+        if not prefixes:
+            return 0
+        return self.ttls[max(prefixes, key=len)]
+
+    @staticmethod
+    def key(api_path: str, params_dict: dict = None) -> tuple:
+        return api_path, tuple(sorted((params_dict or {}).items()))
+
+    def get(self, key: tuple):
+        """
+        返回缓存的值, 不存在或已过期时返回 _MISSING
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] <= time.monotonic():
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return _MISSING
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: tuple, value) -> None:
+        ttl = self.ttl_of(key[0])
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, api_path: str = None) -> None:
+        """
+        清除 api_path 所属资源的缓存, 不传时清空全部
+        """
+        with self._lock:
+            if api_path is None:
+                self._data.clear()
+                return
+            resource = resource_of(api_path)
+            for key in [k for k in self._data if resource_of(k[0]) == resource]:
+                del self._data[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._data), 'maxsize': self.maxsize}
@@ -0,0 +1,258 @@
+import gzip
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from qinglong_sdk.ql_sdk import _data_list
+
+FORMAT_VERSION = 1
+RESOURCES = ('configs', 'envs', 'subs', 'crons', 'views')
+SUB_FIELDS = ('type', 'url', 'schedule_type', 'alias', 'schedule', 'interval_schedule', 'name', 'whitelist',
+              'blacklist', 'branch', 'dependences', 'pull_type', 'pull_option', 'extensions', 'sub_before',
+              'sub_after', 'proxy', 'autoAddCron', 'autoDelCron')
+
+
+def _map_parallel(func, items: list, max_workers: int) -> list:
+    """
+    并行执行 func(item), 返回 [(item, 返回值, 异常)], 顺序与 items 相同
+    """
+    def call(item):
+        try:
+            return item, func(item), None
+        except Exception as e:
+            return item, None, e
+
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as executor:
+        return list(executor.map(call, items))
+
+
+def _fetch_configs(ql, max_workers: int) -> list[dict]:
+    names = [item['value'] if isinstance(item, dict) else item for item in _data_list(ql.cfg_get_all())]
+    results = _map_parallel(ql.cfg_get_detail, names, max_workers)
+    for name, _, error in results:
+        if error is not None:
+            raise error
+    return [{'name': name, 'content': content or ''} for name, content, _ in results]
+
+
+def export_snapshot(ql, path: str, max_workers: int = 8) -> dict:
+    """
+    并行获取定时任务、视图、环境变量、订阅和配置文件, 写入 gzip 压缩的 JSON Lines 文件
+    第一行是 manifest: {'type': 'manifest', 'version', 'created', 'address', 'counts'}
+    之后每行一条记录: {'type': 'cron' | 'view' | 'env' | 'sub' | 'config', 'data': {...}}
+    返回 manifest
+    """
+    fetchers = {
+        'crons': lambda: _data_list(ql.crons_get_all(raw=True)),
+        'views': lambda: _data_list(ql.crons_get_views(raw=True)),
+        'envs': lambda: _data_list(ql.env_get(raw=True)),
+        'subs': lambda: _data_list(ql.subs_get_all(raw=True)),
+        'configs': lambda: _fetch_configs(ql, max_workers),
+    }
+    with ThreadPoolExecutor(max_workers=len(fetchers)) as executor:
+        futures = {name: executor.submit(fetch) for name, fetch in fetchers.items()}
+        data = {name: future.result() for name, future in futures.items()}
+
+    manifest = {'type': 'manifest', 'version': FORMAT_VERSION, 'created': int(time.time()),
+                'address': getattr(ql, 'address', None), 'counts': {name: len(items) for name, items in data.items()}}
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.snapshot-')
+    try:
+        with os.fdopen(fd, 'wb') as f, gzip.GzipFile(fileobj=f, mode='wb') as gz:
+            gz.write(json.dumps(manifest, ensure_ascii=False).encode('utf-8') + b'\n')
+            for resource in RESOURCES:
+                kind = resource[:-1]
+                for item in data[resource]:
+                    gz.write(json.dumps({'type': kind, 'data': item}, ensure_ascii=False).encode('utf-8') + b'\n')
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return manifest
+
+
+def read_snapshot(path: str) -> tuple[dict, dict]:
+    """
+    返回 (manifest, {'crons': [...], 'views': [...], 'envs': [...], 'subs': [...], 'configs': [...]})
+    """
+    data = {resource: [] for resource in RESOURCES}
+    manifest = None
+    with gzip.open(path, 'rb') as f:
+        for line in f:
+            record = json.loads(line)
+            if record['type'] == 'manifest':
+                manifest = record
+            elif f"{record['type']}s" in data:
+                data[f"{record['type']}s"].append(record['data'])
+    if manifest is None:
+        raise ValueError(f"不是快照文件: {path}")
+    if manifest.get('version', 0) > FORMAT_VERSION:
+        raise ValueError(f"不支持的快照版本: {manifest.get('version')}")
+    return manifest, data
+
+
+def _task_ids(value) -> list:
+    """
+    task_before/task_after 为 id 列表时才是对其他任务的引用, 面板上通常是命令字符串
+    """
+    return value if isinstance(value, list) else []
+
+
+def _cron_levels(crons: list[dict]) -> tuple[list[list[dict]], list[dict]]:
+    """
+    按 task_before/task_after 引用分层: 每一层只引用之前层中的任务
+    返回 (层列表, 存在循环引用的任务)
+    """
+    ids = {cron['id'] for cron in crons}
+    pending = {cron['id']: cron for cron in crons}
+    deps = {cron['id']: {_id for _id in _task_ids(cron.get('task_before')) + _task_ids(cron.get('task_after'))
+                         if isinstance(_id, int) and _id in ids and _id != cron['id']}
+            for cron in crons}
+    done = set()
+    levels = []
+    while pending:
+        level = [cron for _id, cron in pending.items() if deps[_id] <= done]
+        if not level:
+            break
+        levels.append(level)
+        for cron in level:
+            done.add(cron['id'])
+            del pending[cron['id']]
+    return levels, list(pending.values())
+
+
+def _remap(values, id_map: dict):
+    if not isinstance(values, list):
+        return values
+    return [id_map.get(v, v) if isinstance(v, int) else v for v in values]
+
+
+def import_snapshot(ql, path: str, resources: tuple = RESOURCES, max_workers: int = 16,
+                    batch_size: int = 500, dry_run: bool = False) -> dict:
+    """
+    把快照恢复到面板, 按 配置文件 -> 环境变量 -> 订阅 -> 定时任务 -> 视图 的顺序
+    已存在的条目不会重复创建: 定时任务按 command, 环境变量按 (name, value), 订阅按 url + alias, 视图按 name 匹配,
+    配置文件内容相同时不保存
+    定时任务的 sub_id 和 id 列表形式的 task_before/task_after 会换成新面板上的 id, 按引用关系分层并行创建,
+    新面板上找不到对应订阅(例如没有恢复 subs 或订阅创建失败)时 sub_id 置空
+    循环引用的任务先创建再更新, 命令字符串形式的 task_before/task_after 原样保存
+    返回 {资源: {'added': n, 'existing': n}, 'failed': {描述: 异常}}
+    """
+    _, data = read_snapshot(path)
+    report = {resource: {'added': 0, 'existing': 0} for resource in resources}
+    report['failed'] = {}
+
+    def collect(results, describe):
+        for item, rt, error in results:
+            if error is not None:
+                report['failed'][describe(item)] = error
+        return [(item, rt) for item, rt, error in results if error is None]
+
+    if 'configs' in resources:
+        current = dict((item['name'], content) for item, content in collect(
+            _map_parallel(lambda item: ql.cfg_get_detail(item['name']) or '', data['configs'], max_workers),
+            lambda item: f"config {item['name']}"))
+        todo = [item for item in data['configs']
+                if item['name'] in current and current[item['name']] != item['content']]
+        report['configs']['existing'] = len(current) - len(todo)
+        if not dry_run:
+            saved = collect(_map_parallel(lambda item: ql.cfg_save(item['name'], item['content']), todo, max_workers),
+                            lambda item: f"config {item['name']}")
+            todo = [item for item, _ in saved]
+        report['configs']['added'] = len(todo)
+
+    if 'envs' in resources:
+        existing = {(env['name'], env['value']) for env in _data_list(ql.env_get(raw=True))}
+        todo = [env for env in data['envs'] if (env['name'], env['value']) not in existing]
+        report['envs']['existing'] = len(data['envs']) - len(todo)
+        report['envs']['added'] = len(todo)
+        if not dry_run and todo:
+            batches = [todo[i:i + batch_size] for i in range(0, len(todo), batch_size)]
+            added = collect(_map_parallel(
+                lambda batch: ql._post("/open/envs", [{'name': env['name'], 'value': env['value'],
+                                                       'remarks': env.get('remarks') or ''} for env in batch]),
+                batches, max_workers), lambda batch: f"envs {batch[0]['name']}...({len(batch)})")
+            disabled = [new['id'] for batch, rt in added for env, new in zip(batch, rt or []) if env.get('status') == 1]
+            report['envs']['added'] = sum(len(batch) for batch, _ in added)
+            if disabled:
+                ql.env_disable(disabled)
+
+    sub_map = {}
+    # 不恢复订阅时也要把 sub_id 换成面板上已有的同一订阅
+    if 'subs' in resources or ('crons' in resources and any(cron.get('sub_id') for cron in data['crons'])):
+        existing = {(sub.get('url'), sub.get('alias')): sub['id'] for sub in _data_list(ql.subs_get_all(raw=True))}
+        todo = []
+        for sub in data['subs']:
+            key = (sub.get('url'), sub.get('alias'))
+            if key in existing:
+                sub_map[sub['id']] = existing[key]
+            else:
+                todo.append(sub)
+    if 'subs' in resources:
+        report['subs']['existing'] = len(data['subs']) - len(todo)
+        report['subs']['added'] = len(todo)
+        if not dry_run and todo:
+            added = collect(_map_parallel(lambda sub: ql.subs_add(**{k: sub.get(k) for k in SUB_FIELDS}),
+                                          todo, max_workers), lambda sub: f"sub {sub.get('name') or sub.get('url')}")
+            for sub, rt in added:
+                sub_map[sub['id']] = rt['id']
+            report['subs']['added'] = len(added)
+            disabled = [sub_map[sub['id']] for sub, _ in added if sub.get('is_disabled') == 1]
+            if disabled:
+                ql.subs_disable(disabled)
+
+    if 'crons' in resources:
+        existing = {cron['command']: cron['id'] for cron in _data_list(ql.crons_get_all(raw=True))}
+        cron_map = {}
+        todo = []
+        for cron in data['crons']:
+            if cron['command'] in existing:
+                cron_map[cron['id']] = existing[cron['command']]
+            else:
+                todo.append(cron)
+        report['crons']['existing'] = len(data['crons']) - len(todo)
+        report['crons']['added'] = len(todo)
+        if not dry_run and todo:
+            levels, cyclic = _cron_levels(todo)
+
+            def payload(cron, with_tasks=True):
+                return {'command': cron['command'], 'schedule': cron['schedule'], 'name': cron.get('name'),
+                        'labels': cron.get('labels'), 'sub_id': sub_map.get(cron.get('sub_id')),
+                        'extra_schedules': cron.get('extra_schedules'),
+                        'task_before': _remap(cron.get('task_before'), cron_map) if with_tasks else None,
+                        'task_after': _remap(cron.get('task_after'), cron_map) if with_tasks else None}
+
+            added = []
+            for level in levels + [cyclic]:
+                with_tasks = level is not cyclic
+                results = collect(_map_parallel(lambda cron: ql.crons_add(**payload(cron, with_tasks)),
+                                                level, max_workers), lambda cron: f"cron {cron['command']}")
+                for cron, rt in results:
+                    cron_map[cron['id']] = rt['id']
+                added.extend(results)
+            collect(_map_parallel(lambda cron: ql.crons_update(cron_map[cron['id']], **payload(cron)),
+                                  [cron for cron in cyclic if cron['id'] in cron_map], max_workers),
+                    lambda cron: f"cron {cron['command']}")
+            report['crons']['added'] = len(added)
+            disabled = [cron_map[cron['id']] for cron, _ in added if cron.get('isDisabled') == 1]
+            if disabled:
+                ql.crons_disable(disabled)
+
+    if 'views' in resources:
+        existing = {view['name'] for view in _data_list(ql.crons_get_views(raw=True))}
+        todo = [view for view in data['views'] if view['name'] not in existing]
+        report['views']['existing'] = len(data['views']) - len(todo)
+        report['views']['added'] = len(todo)
+        if not dry_run and todo:
+            added = collect(_map_parallel(lambda view: ql.crons_add_view(view['name'], view.get('filters') or [],
+                                                                         view.get('filterRelation') or 'and',
+                                                                         view.get('sorts')),
+                                          todo, max_workers), lambda view: f"view {view['name']}")
+            report['views']['added'] = len(added)
+    return report
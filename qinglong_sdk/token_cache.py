@@ -0,0 +1,90 @@
+import contextlib
+import json
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+
+class TokenCache:
+    """
+    基于文件的 token 缓存, 同一台机器上的多个进程可以共享
+    写入时使用文件锁 + 原子替换, 读取时忽略已过期的 token
+    """
+
+    def __init__(self, path: str = None, margin: float = 60) -> None:
+        """
+        path: 缓存文件路径, 默认为 ~/.cache/qinglong_sdk/tokens.json
+        margin: 距离过期不足 margin 秒的 token 视为已过期
+        """
+        if path is None:
+            path = os.path.join(os.path.expanduser("~"), ".cache", "qinglong_sdk", "tokens.json")
+        self.path = path
+        self.margin = margin
+
+    @staticmethod
+    def key(address: str, app_id: str) -> str:
+        import hashlib
+
+        return hashlib.sha256(f"{address}|{app_id}".encode()).hexdigest()
+
+    @contextlib.contextmanager
+    def _lock(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(f"{self.path}.lock", "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _dump(self, data: dict) -> None:
+        import tempfile
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tokens-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.chmod(tmp, 0o600)
+            os.replace(tmp, self.path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
+            raise
+
+    def get(self, key: str) -> tuple[str, float] | None:
+        """
+        返回 (auth, expiration), 不存在或已过期时返回 None
+        """
+        item = self._load().get(key)
+        if not item or item['expiration'] - self.margin <= time.time():
+            return None
+        return item['auth'], item['expiration']
+
+    def set(self, key: str, auth: str, expiration: float) -> None:
+        with self._lock():
+            data = self._load()
+            now = time.time()
+            data = {k: v for k, v in data.items() if v.get('expiration', 0) > now}
+            data[key] = {'auth': auth, 'expiration': expiration}
+            self._dump(data)
+
+    def delete(self, key: str) -> None:
+        with self._lock():
+            data = self._load()
+            if data.pop(key, None) is not None:
+                self._dump(data)
@@ -0,0 +1,246 @@
+import hashlib
+import json
+import threading
+import time
+from typing import Callable
+
+# 运行状态: 0 运行中, 0.5 排队中, 1 空闲
+_RUNNING = (0, 0.5)
+_RESOURCES = {
+    # 资源: (列表路径, 状态字段, 禁用字段, 禁用时的值)
+    'crons': ('/open/crons', 'status', 'isDisabled', 1),
+    'envs': ('/open/envs', None, 'status', 1),
+    'subs': ('/open/subscriptions', 'status', 'is_disabled', 1),
+}
+
+
+class WatchEvent:
+    """
+    type: added / removed / changed / started / queued / finished / enabled / disabled
+    item: 当前的条目, removed 事件为 None
+    old, changes: 变化前的条目和变化的字段 {字段: (旧值, 新值)}, 只有 Watcher(details=True) 时才有
+    """
+
+    __slots__ = ('type', 'resource', 'id', 'item', 'old', 'changes')
+
+    def __init__(self, type: str, resource: str, id, item: dict = None, old: dict = None,
+                 changes: dict = None) -> None:
+        self.type = type
+        self.resource = resource
+        self.id = id
+        self.item = item
+        self.old = old
+        self.changes = changes
+
+    def __repr__(self) -> str:
+        return f"WatchEvent({self.type!r}, {self.resource!r}, id={self.id!r})"
+
+
+def _fingerprint(item: dict, ignore: tuple = ()) -> bytes:
+    """
+    条目的摘要, 与进程无关, ignore 中的字段不参与计算
+    """
+    if ignore:
+        item = {k: v for k, v in item.items() if k not in ignore}
+    data = json.dumps(item, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.blake2b(data.encode('utf-8'), digest_size=16).digest()
+
+
+def _transitions(resource: str, _id, item: dict, old: dict | None, status: tuple | None,
+                 disabled: tuple | None) -> list[WatchEvent]:
+    """
+    status/disabled: 运行状态和禁用字段变化前后的 (旧值, 新值), 没有变化时为 None
+    """
+    disabled_value = _RESOURCES[resource][3]
+    events = []
+    if status:
+        was, now = status
+        if now == 0 and was != 0:
+            events.append(WatchEvent('started', resource, _id, item, old))
+        elif now == 0.5 and was != 0.5:
+            events.append(WatchEvent('queued', resource, _id, item, old))
+        elif was in _RUNNING and now not in _RUNNING:
+            events.append(WatchEvent('finished', resource, _id, item, old))
+    if disabled:
+        events.append(WatchEvent('disabled' if disabled[1] == disabled_value else 'enabled', resource, _id, item, old))
+    return events
+
+
+def diff(resource: str, old: dict, new: dict, ignore: tuple = ()) -> list[WatchEvent]:
+    """
+    比较两个快照 {id: item}, 返回事件列表
+    """
+    _, status_field, disabled_field, _ = _RESOURCES[resource]
+    events = []
+    for _id, item in new.items():
+        before = old.get(_id)
+        if before is None:
+            events.append(WatchEvent('added', resource, _id, item))
+            continue
+        changes = {k: (before.get(k), item.get(k)) for k in before.keys() | item.keys()
+                   if k not in ignore and before.get(k) != item.get(k)}
+        if not changes:
+            continue
+        events.append(WatchEvent('changed', resource, _id, item, before, changes))
+        events.extend(_transitions(resource, _id, item, before, changes.get(status_field),
+                                   changes.get(disabled_field)))
+    for _id, item in old.items():
+        if _id not in new:
+            events.append(WatchEvent('removed', resource, _id, None, item))
+    return events
+
+
+class Watcher:
+    """
+    定时获取 crons / envs / subs 的列表, 与上一次的快照比较, 只把变化以事件的形式发出
+    每种资源单独计时, 没有变化时轮询间隔逐步加大到 max_interval, 有变化时恢复为 interval
+    快照中每个条目只保存 16 字节的摘要和运行状态、禁用字段; details=True 时另外保存完整的条目,
+    changed 事件才能给出 old 和 changes, 内存占用与条目总大小成正比
+
+    for event in ql.watch(['crons']):
+        print(event.type, event.id, event.changes)
+
+    watcher = ql.watch(on_event=handle)
+    watcher.start()
+    """
+
+    def __init__(self, ql, resources=('crons', 'envs', 'subs'),
+                 interval: float = 5,
+                 max_interval: float = 60,
+                 backoff: float = 2,
+                 on_event: Callable = None,
+                 on_error: Callable = None,
+                 ignore: tuple = (),
+                 initial: bool = False,
+                 details: bool = False) -> None:
+        """
+        resources: 要监视的资源, crons / envs / subs
+        interval, max_interval: 最短和最长的轮询间隔(秒), backoff: 没有变化时间隔乘以的倍数
+        on_event(event): 收到事件时调用
+        on_error(resource, error): 获取失败时调用, 为空时抛出异常
+        ignore: 不比较的字段, 例如 ('updatedAt',)
+        initial: 第一次获取时是否为已有的条目发出 added 事件
+        details: 保存完整的条目, changed 事件带有 old 和 changes
+        """
+        if isinstance(resources, str):
+            resources = [resources]
+        for resource in resources:
+            if resource not in _RESOURCES:
+                raise ValueError(f"不支持的资源: {resource}")
+        self.ql = ql
+        self.resources = list(resources)
+        self.interval = interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.on_event = [on_event] if on_event else []
+        self.on_error = on_error
+        self.ignore = tuple(ignore)
+        self.initial = initial
+        self.details = details
+        # 资源: {id: (摘要, 运行状态, 禁用字段, details 时为完整条目否则为 None)}
+        self.snapshots = {}
+        self._intervals = {resource: interval for resource in self.resources}
+        self._due = {resource: 0 for resource in self.resources}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _fetch(self, resource: str) -> list:
+        from qinglong_sdk.ql_sdk import _data_list
+
+        # 不读取响应缓存, 否则缓存期内看不到变化
+        return _data_list(self.ql._get(_RESOURCES[resource][0], cached=False))
+
+    def _poll_resource(self, resource: str) -> list[WatchEvent]:
+        _, status_field, disabled_field, _ = _RESOURCES[resource]
+        if status_field in self.ignore:
+            status_field = None
+        if disabled_field in self.ignore:
+            disabled_field = None
+        items = {item['id']: item for item in self._fetch(resource)}
+        current = {_id: (_fingerprint(item, self.ignore),
+                         item.get(status_field) if status_field else None,
+                         item.get(disabled_field) if disabled_field else None,
+                         item if self.details else None)
+                   for _id, item in items.items()}
+        previous = self.snapshots.get(resource)
+        self.snapshots[resource] = current
+        if previous is None:
+            if not self.initial:
+                return []
+            previous = {}
+        # 摘要没变的条目不需要比较
+        changed = [_id for _id, entry in current.items() if _id not in previous or previous[_id][0] != entry[0]]
+        removed = [_id for _id in previous if _id not in current]
+        if self.details:
+            return diff(resource, {_id: previous[_id][3] for _id in changed + removed if _id in previous},
+                        {_id: items[_id] for _id in changed}, self.ignore)
+
+        events = []
+        for _id in changed:
+            item = items[_id]
+            before = previous.get(_id)
+            if before is None:
+                events.append(WatchEvent('added', resource, _id, item))
+                continue
+            now = current[_id]
+            events.append(WatchEvent('changed', resource, _id, item))
+            events.extend(_transitions(resource, _id, item, None,
+                                       (before[1], now[1]) if before[1] != now[1] else None,
+                                       (before[2], now[2]) if before[2] != now[2] else None))
+        events.extend(WatchEvent('removed', resource, _id) for _id in removed)
+        return events
+
+    def poll(self, force: bool = True) -> list[WatchEvent]:
+        """
+        获取一次, 返回事件并调用 on_event
+        force=False 时只获取已经到期的资源
+        """
+        events = []
+        now = time.monotonic()
+        for resource in self.resources:
+            if not force and self._due[resource] > now:
+                continue
+            try:
+                changed = self._poll_resource(resource)
+            except Exception as e:
+                if self.on_error is None:
+                    raise
+                self.on_error(resource, e)
+                changed = []
+            if changed:
+                self._intervals[resource] = self.interval
+            else:
+                self._intervals[resource] = min(self._intervals[resource] * self.backoff, self.max_interval)
+            self._due[resource] = time.monotonic() + self._intervals[resource]
+            events.extend(changed)
+        for event in events:
+            for callback in self.on_event:
+                callback(event)
+        return events
+
+    def __iter__(self):
+        while not self._stop.is_set():
+            yield from self.poll(force=False)
+            self._stop.wait(max(0.0, min(self._due.values()) - time.monotonic()))
+
+    def run(self) -> None:
+        """
+        阻塞运行, 直到调用 stop
+        """
+        for _ in self:
+            pass
+
+    def start(self) -> 'Watcher':
+        """
+        在后台线程中运行
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name='qinglong-watch', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = None) -> None:
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+            self._thread = None
@@ -20,6 +20,14 @@ setup(
         'loguru',
         'requests',
     ],
+    entry_points={
+        'console_scripts': ['qlctl=qinglong_sdk.cli:main'],
+    },
+    extras_require={
+        'async': ['aiohttp'],
+        'fast': ['orjson'],
+        'dotenv': ['python-dotenv'],
+    },
     classifiers=[
         "Programming Language :: Python :: 3.6",
         "Development Status :: 4 - Beta",
@@ -0,0 +1,37 @@
+import pytest
+
+from qinglong_sdk.mock_server import CLIENT_ID, CLIENT_SECRET, MockQLServer
+from qinglong_sdk.ql_sdk import QL
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'server(**kwargs): MockQLServer 的参数, 例如 latency=0.2')
+
+
+@pytest.fixture
+def server(request):
+    marker = request.node.get_closest_marker('server')
+    with MockQLServer(**(marker.kwargs if marker else {})) as server:
+        yield server
+
+
+@pytest.fixture
+def make_ql():
+    """
+    make_ql(server, **kwargs) 创建连接到 server 的 QL, 测试结束时关闭
+    """
+    clients = []
+
+    def make(server, **kwargs):
+        ql = QL(server.url, CLIENT_ID, CLIENT_SECRET, **kwargs)
+        clients.append(ql)
+        return ql
+
+    yield make
+    for ql in clients:
+        ql.close()
+
+
+@pytest.fixture
+def ql(server, make_ql):
+    return make_ql(server)
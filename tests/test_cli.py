@@ -0,0 +1,42 @@
+import io
+import json
+
+import pytest
+
+from qinglong_sdk.cli import _op_keys, execute
+
+
+def _lines(*ops):
+    return [json.dumps({'op': op, 'args': args}) for op, args in ops]
+
+
+def test_op_keys():
+    assert _op_keys('crons_disable', [[1, 2]]) == {('crons', 1), ('crons', 2)}
+    assert _op_keys('crons_get_task_detail', {'cron_id': 3}) == {('crons', 3)}
+    assert _op_keys('env_update', [3, 'NAME', 'value']) == {('env', 3)}
+    assert _op_keys('crons_del_view', [[3]]) == {('views', 3)}
+    assert _op_keys('crons_get_all', []) == set()
+    assert _op_keys('crons_run', {'unknown': 1}) == set()
+
+
+@pytest.mark.server(latency=0.01)
+def test_same_id_keeps_input_order(server, ql):
+    server.seed(crons=3)
+    for _ in range(10):
+        out = io.StringIO()
+        lines = _lines(('crons_disable', [1]), ('crons_get_task_detail', [2]), ('crons_enable', [1]),
+                       ('crons_disable', [3]), ('crons_enable', [3]), ('crons_disable', [3]))
+        assert execute(ql, lines, workers=8, out=out) == 0
+        assert server.state.crons[1]['isDisabled'] == 0
+        assert server.state.crons[3]['isDisabled'] == 1
+
+
+@pytest.mark.server(latency=0.01)
+def test_ordered_outputs_in_input_order(server, ql):
+    server.seed(crons=5)
+    out = io.StringIO()
+    lines = _lines(*[('crons_get_task_detail', [i]) for i in range(5, 0, -1)], ('no_such_op', []))
+    assert execute(ql, lines, workers=8, out=out, ordered=True) == 1
+    results = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [result['line'] for result in results] == [1, 2, 3, 4, 5, 6]
+    assert [result['result']['id'] for result in results[:5]] == [5, 4, 3, 2, 1]
@@ -0,0 +1,69 @@
+import pytest
+
+from qinglong_sdk.config_edit import ConfigSession
+from qinglong_sdk.exceptions import QLConflictError
+
+
+def test_crlf_preserved_and_same_value_is_noop(server, ql):
+    server.state.configs['config.sh'] = 'export A="1"\r\nexport B="2"\r\n'
+    cfg = ql.cfg_edit()
+    cfg.set('A', '1')
+    assert not cfg.changed
+    assert cfg.save() is False
+
+    cfg.set('B', '3')
+    cfg.set('C', 'x')
+    assert cfg.save() is True
+    assert server.state.configs['config.sh'] == 'export A="1"\r\nexport B="3"\r\nexport C="x"\r\n'
+
+
+def test_no_trailing_newline(server, ql):
+    server.state.configs['config.sh'] = 'export A="1"'
+    with ql.cfg_edit() as cfg:
+        cfg.set('B', '2')
+    assert server.state.configs['config.sh'] == 'export A="1"\nexport B="2"'
+
+
+def test_inline_comment(server, ql):
+    server.state.configs['config.sh'] = 'export A="1" # note\nexport B=plain # other\nexport C="a # b"\n'
+    cfg = ql.cfg_edit()
+    assert cfg.get('A') == '1'
+    assert cfg.get('B') == 'plain'
+    assert cfg.get('C') == 'a # b'
+    cfg.set('A', cfg.get('A'))
+    assert not cfg.changed
+    cfg.set('A', '2')
+    assert cfg.get('A') == '2'
+    assert cfg.content.splitlines()[0] == 'export A="2" # note'
+
+
+def test_concurrent_edit_rebases(server, ql):
+    server.state.configs['config.sh'] = 'export A="1"\nexport B="1"\n'
+    cfg = ql.cfg_edit()
+    cfg.set('A', '2')
+    # 其他人修改了另一个变量
+    other = ConfigSession(ql, 'config.sh', content=server.state.configs['config.sh'])
+    other.set('B', '2')
+    assert other.save()
+
+    assert cfg.save() is True
+    assert server.state.configs['config.sh'] == 'export A="2"\nexport B="2"\n'
+
+
+def test_concurrent_edit_conflicts(server, ql):
+    server.state.configs['config.sh'] = 'export A="1"\nexport B="1"\n'
+    cfg = ql.cfg_edit()
+    cfg.set('A', '2')
+    ql.cfg_save('config.sh', 'export A="3"\nexport B="1"\n')
+
+    with pytest.raises(QLConflictError):
+        cfg.save()
+    assert server.state.configs['config.sh'] == 'export A="3"\nexport B="1"\n'
+    # 不 rebase 时即使修改的是其他变量也视为冲突
+    cfg = ql.cfg_edit()
+    cfg.set('B', '2')
+    ql.cfg_save('config.sh', 'export A="4"\nexport B="1"\n')
+    with pytest.raises(QLConflictError):
+        cfg.save(rebase=False)
+    assert cfg.save(force=True)
+    assert server.state.configs['config.sh'] == 'export A="3"\nexport B="2"\n'
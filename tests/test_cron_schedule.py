@@ -0,0 +1,69 @@
+import datetime
+
+import pytest
+
+from qinglong_sdk.cron_schedule import CronExpr, next_runs, plan_stagger, schedule_report
+
+START = datetime.datetime(2024, 1, 1)  # 周一
+
+
+def test_parse_fields():
+    expr = CronExpr('*/15 9-10 * * mon-fri')
+    assert expr.seconds == (0,)
+    assert expr.minutes == (0, 15, 30, 45)
+    assert expr.hours == (9, 10)
+    assert expr.weekdays == (1, 2, 3, 4, 5)
+    assert CronExpr('0 0 * * 7').weekdays == (0,)
+    assert CronExpr('30 0 0 * * *').seconds == (30,)
+    assert CronExpr('@daily').day_minutes() == [0]
+
+
+@pytest.mark.parametrize('expr', ['* * * *', '60 * * * *', '*/0 * * * *', 'x * * * *', '5-1 * * * *'])
+def test_invalid(expr):
+    with pytest.raises(ValueError):
+        CronExpr(expr)
+
+
+def test_next_run():
+    assert CronExpr('0 9 * * *').next_run(START) == datetime.datetime(2024, 1, 1, 9)
+    assert CronExpr('0 9 * * *').next_run(START.replace(hour=9)) == datetime.datetime(2024, 1, 2, 9)
+    assert CronExpr('0 0 * * sun').next_run(START) == datetime.datetime(2024, 1, 7)
+    assert CronExpr('*/20 * * * * *').next_run(START) == START + datetime.timedelta(seconds=20)
+    # 日和周都指定时满足其一即可
+    assert CronExpr('0 0 15 * sun').next_run(START) == datetime.datetime(2024, 1, 7)
+    # 永远不会执行
+    assert CronExpr('0 0 30 2 *').next_run(START) is None
+
+
+def test_iter_from_end():
+    runs = list(CronExpr('0 */6 * * *').iter_from(START, START + datetime.timedelta(days=1)))
+    assert [run.hour for run in runs] == [0, 6, 12, 18]
+
+
+def test_next_runs_with_extra_schedules():
+    crons = [{'id': 1, 'schedule': '0 12 * * *', 'extra_schedules': [{'schedule': '0 6 * * *'}]},
+             {'id': 2, 'schedule': 'bad'}]
+    result = next_runs(crons, START, count=3)
+    assert [run.hour for run in result[1]] == [6, 12, 6]
+    assert result[2] == []
+
+
+def test_schedule_report():
+    crons = [{'id': 1, 'schedule': '0 * * * *'}, {'id': 2, 'schedule': '0 */2 * * *'},
+             {'id': 3, 'schedule': '0 * * * *', 'isDisabled': 1}, {'id': 4, 'schedule': 'bad'}]
+    report = schedule_report(crons, START, hours=4)
+    assert sum(report['histogram'].values()) == 6
+    assert report['peak'] == (START, 2)
+    assert [item['minute'].hour for item in report['collisions']] == [0, 2]
+    assert report['collisions'][0]['ids'] == [1, 2]
+    assert list(report['invalid']) == [4]
+
+
+def test_plan_stagger():
+    crons = [{'id': i, 'name': str(i), 'schedule': '0 8 * * *'} for i in range(1, 4)]
+    crons.append({'id': 4, 'schedule': '1 8 * * *'})
+    plan = plan_stagger(crons, window=5)
+    assert [(item['id'], item['new']) for item in plan] == [(2, '2 8 * * *'), (3, '3 8 * * *')]
+    # 不跨天
+    late = [{'id': i, 'schedule': '59 23 * * *'} for i in range(1, 3)]
+    assert plan_stagger(late) == []
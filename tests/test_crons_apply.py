@@ -0,0 +1,60 @@
+from qinglong_sdk.ql_sdk import _data_list
+
+
+def _crons(ql):
+    return {cron['command']: cron for cron in _data_list(ql.crons_get_all(raw=True))}
+
+
+def test_crons_apply(ql):
+    ql.crons_add('task a.js', '0 1 * * *', 'a', labels=['x'])
+    ql.crons_add('task b.js', '0 2 * * *', 'b', labels=['x', 'y'])
+    ql.crons_add('task c.js', '0 3 * * *', 'c')
+    spec = [
+        {'command': 'task a.js', 'schedule': '0 1 * * *', 'name': 'a', 'labels': ['x']},
+        {'command': 'task b.js', 'schedule': '0 2 * * *', 'name': 'b', 'labels': ['x', 'z'], 'enabled': False},
+        {'command': 'task d.js', 'schedule': '0 4 * * *', 'name': 'd', 'enabled': False},
+    ]
+
+    report = ql.crons_apply(spec, prune=True, dry_run=True)
+    assert report['unchanged'] == 1
+    assert report['update'] == []
+    assert report['add_labels'] == {('z',): [_crons(ql)['task b.js']['id']]}
+    assert report['remove_labels'] == {('y',): [_crons(ql)['task b.js']['id']]}
+    assert [cron['command'] for cron in report['add']] == ['task d.js']
+    assert report['delete'] == [_crons(ql)['task c.js']['id']]
+    assert len(_crons(ql)) == 3
+
+    ql.crons_apply(spec, prune=True)
+    crons = _crons(ql)
+    assert sorted(crons) == ['task a.js', 'task b.js', 'task d.js']
+    assert sorted(crons['task b.js']['labels']) == ['x', 'z']
+    assert crons['task b.js']['isDisabled'] == 1
+    assert crons['task d.js']['isDisabled'] == 1
+
+    report = ql.crons_apply(spec, prune=True)
+    assert report['unchanged'] == 3
+    assert not any(report[k] for k in ('add', 'update', 'delete', 'enable', 'disable',
+                                       'add_labels', 'remove_labels'))
+
+    spec[0]['schedule'] = '30 1 * * *'
+    report = ql.crons_apply(spec)
+    assert [(cron['command'], cron['schedule']) for cron in report['update']] == [('task a.js', '30 1 * * *')]
+    assert _crons(ql)['task a.js']['schedule'] == '30 1 * * *'
+
+
+def test_crons_apply_duplicate_commands(ql):
+    first = ql.crons_add('task a.js', '0 1 * * *', 'a')['id']
+    dup = ql.crons_add('task a.js', '0 5 * * *', 'a copy')['id']
+    other = ql.crons_add('task c.js', '0 3 * * *', 'c')['id']
+    other_dup = ql.crons_add('task c.js', '0 3 * * *', 'c')['id']
+    spec = [{'command': 'task a.js', 'schedule': '0 1 * * *', 'name': 'a'}]
+
+    report = ql.crons_apply(spec)
+    assert report['unchanged'] == 1
+    assert sorted(report['duplicates']) == sorted([dup, other_dup])
+    assert report['delete'] == []
+    assert len(_data_list(ql.crons_get_all(raw=True))) == 4
+
+    report = ql.crons_apply(spec, prune=True)
+    assert sorted(report['delete']) == sorted([dup, other, other_dup])
+    assert [cron['id'] for cron in _data_list(ql.crons_get_all(raw=True))] == [first]
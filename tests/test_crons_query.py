@@ -0,0 +1,38 @@
+import pytest
+
+from qinglong_sdk.ql_sdk import _data_list
+
+
+def _names(rt):
+    return sorted(cron['name'] for cron in _data_list(rt))
+
+
+def test_view_and_filters_narrow(server, ql):
+    server.seed(crons=30)
+    view = ql.crons_add_view('and view', [['name', 'Reg', 'script_2'], ['labels', 'Reg', 'group5']])
+    assert _names(ql.crons_get_all(view_id=view['id'])) == ['script_25']
+    assert _names(ql.crons_get_all(view_id=view['id'], filters=[['name', 'Reg', 'script_1']])) == []
+
+    # 视图只有一个条件时, 调用方的多个条件保持 filter_relation
+    view = ql.crons_add_view('single', [['name', 'Reg', 'script_2']])
+    assert _names(ql.crons_get_all(view_id=view['id'], filters=[['labels', 'Reg', 'group3'],
+                                                                ['labels', 'Reg', 'group4']],
+                                   filter_relation='and')) == []
+    assert _names(ql.crons_get_all(view_id=view['id'], filters=[['labels', 'Reg', 'group3']])) == ['script_23']
+
+
+def test_or_view_with_filters_rejected(server, ql):
+    server.seed(crons=30)
+    view = ql.crons_add_view('or view', [['name', 'Reg', 'script_2'], ['labels', 'Reg', 'group5']], 'or')
+    # script_2, script_20-29 以及 group5 中的 script_5, script_15
+    assert len(_data_list(ql.crons_get_all(view_id=view['id']))) == 13
+    # (视图条件 or) and filters 无法用一层条件表示, 不能悄悄放宽结果
+    with pytest.raises(ValueError):
+        ql.crons_get_all(view_id=view['id'], filters=[['name', 'Reg', 'script_25']])
+    with pytest.raises(ValueError):
+        list(ql.iter_crons(view_id=view['id'], filters=[['name', 'Reg', 'script_25']]))
+
+    view = ql.crons_add_view('and view', [['name', 'Reg', 'script_2'], ['labels', 'Reg', 'group5']])
+    with pytest.raises(ValueError):
+        ql.crons_get_all(view_id=view['id'], filters=[['name', 'Reg', 'a'], ['name', 'Reg', 'b']],
+                         filter_relation='or')
@@ -0,0 +1,25 @@
+import pytest
+
+
+@pytest.mark.server(run_time=0.05)
+def test_run_and_wait(server, ql):
+    server.seed(crons=3)
+    result = ql.crons_run_and_wait([1, 2, 3], timeout=10, max_concurrent=2, min_interval=0.05)
+    assert {_id: item['status'] for _id, item in result.items()} == {1: 'finished', 2: 'finished', 3: 'finished'}
+    assert all(item['duration'] is not None for item in result.values())
+
+
+@pytest.mark.server(run_time=0.05, clock_skew=-30)
+def test_run_and_wait_with_panel_clock_behind(server, ql):
+    server.seed(crons=2)
+    # 任务在第一次轮询前就已结束, 面板记录的 last_execution_time 早于本机的触发时间
+    result = ql.crons_run_and_wait([1, 2], timeout=5, min_interval=0.3)
+    assert {_id: item['status'] for _id, item in result.items()} == {1: 'finished', 2: 'finished'}
+
+
+@pytest.mark.server(run_time=60)
+def test_run_and_wait_timeout(server, ql):
+    server.seed(crons=2)
+    result = ql.crons_run_and_wait([1, 2], timeout=0.3, max_concurrent=1, min_interval=0.05)
+    assert result[1]['status'] == 'timeout'
+    assert result[2] == {'status': 'pending', 'duration': None}
@@ -0,0 +1,87 @@
+import threading
+
+import pytest
+
+from qinglong_sdk.dag import CronDAG, find_cycle
+
+
+def test_find_cycle():
+    assert find_cycle({1: [2], 2: [3], 3: []}) is None
+    cycle = find_cycle({1: [2], 2: [3], 3: [1], 4: [1]})
+    assert cycle[0] == cycle[-1] and set(cycle) == {1, 2, 3}
+    assert find_cycle({1: [1]}) == [1, 1]
+    with pytest.raises(ValueError):
+        CronDAG({1: [2], 2: [1]})
+
+
+def test_rank_and_critical_path():
+    # 1 -> 3 -> 4, 2 -> 3, 5 单独
+    dag = CronDAG({3: [1, 2], 4: [3], 5: []}, durations={1: 10, 2: 1, 3: 5, 4: 2, 5: 30})
+    assert dag.rank == {1: 17, 2: 8, 3: 7, 4: 2, 5: 30}
+    assert dag.critical_path() == [5]
+    dag.durations[5] = 1
+    assert CronDAG(dag.deps, dag.durations).critical_path() == [1, 3, 4]
+    order = dag.order()
+    assert order.index(1) < order.index(3) < order.index(4) and order.index(2) < order.index(3)
+
+
+def test_from_crons():
+    crons = [{'id': 1, 'task_before': 'echo hi', 'last_running_time': 5},
+             {'id': 2, 'task_before': [1], 'task_after': [3]},
+             {'id': 3, 'task_after': None},
+             {'id': 4, 'task_before': [99]}]
+    dag = CronDAG.from_crons(crons)
+    assert dag.deps == {2: {1}, 3: {2}, 1: set()}
+    assert dag.durations[1] == 5
+    assert CronDAG.from_crons(crons, ids=[2, 3]).deps == {2: set(), 3: {2}}
+
+
+@pytest.mark.server(run_time=0.05)
+def test_run_order_under_parallelism(server, ql):
+    server.seed(crons=4)
+    # 1 所在的依赖链最长, 应该最先运行
+    dag = CronDAG({2: [1], 3: [2], 4: []})
+    finished = []
+    result = dag.run(ql, parallelism=1, timeout=10, min_interval=0.02,
+                     on_finish=lambda node, item: finished.append(node))
+    assert all(item['status'] == 'finished' for item in result.values())
+    assert finished == [1, 2, 3, 4]
+
+    dag = CronDAG({3: [1, 2], 4: []})
+    result = dag.run(ql, parallelism=2, timeout=10, min_interval=0.02)
+    assert result[3]['started'] >= max(result[1]['finished'], result[2]['finished'])
+
+
+@pytest.mark.server(run_time=0.05)
+def test_failed_run_skips_dependents(server, ql):
+    server.seed(crons=2)
+    # 99 不存在, crons_run 失败
+    dag = CronDAG({99: [], 5: [99], 6: [5], 1: [], 2: [1]}, durations={99: 10})
+    result = dag.run(ql, parallelism=1, timeout=10, min_interval=0.02)
+    assert result[99]['status'] == 'failed' and result[99]['error'] is not None
+    assert result[5]['status'] == result[6]['status'] == 'skipped'
+    assert result[1]['status'] == result[2]['status'] == 'finished'
+
+
+@pytest.mark.server(run_time=0.5)
+def test_missing_cron_skips_dependents(server, ql):
+    server.seed(crons=2)
+    threading.Timer(0.1, server.state.crons.pop, (1,)).start()
+    result = CronDAG({2: [1]}).run(ql, timeout=10, min_interval=0.05)
+    assert result[1]['status'] == 'missing'
+    assert result[2]['status'] == 'skipped'
+
+
+@pytest.mark.server(run_time=0.05, clock_skew=-30)
+def test_run_with_panel_clock_behind(server, ql):
+    server.seed(crons=2)
+    result = CronDAG({2: [1]}).run(ql, timeout=5, min_interval=0.3)
+    assert result[1]['status'] == result[2]['status'] == 'finished'
+
+
+@pytest.mark.server(run_time=60)
+def test_run_timeout(server, ql):
+    server.seed(crons=2)
+    result = CronDAG({2: [1]}).run(ql, timeout=0.3, min_interval=0.05)
+    assert result[1]['status'] == 'timeout'
+    assert result[2]['status'] == 'pending'
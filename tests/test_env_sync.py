@@ -0,0 +1,40 @@
+def _envs(ql):
+    return sorted((env['name'], env['value'], env.get('remarks') or '', env.get('status'))
+                  for env in ql.env_get(raw=True))
+
+
+def test_env_sync(ql):
+    for name, value in (('A', '1'), ('B', '1'), ('B', '2'), ('C', '1')):
+        ql.env_add(name, value)
+    desired = [
+        {'name': 'A', 'value': '1', 'remarks': 'note'},
+        {'name': 'B', 'value': '2'},
+        {'name': 'B', 'value': '3', 'enabled': False},
+        {'name': 'D', 'value': '1'},
+    ]
+
+    report = ql.env_sync(desired, prune=True, dry_run=True)
+    assert report['unchanged'] == 1
+    assert sorted((env['name'], env['value']) for env in report['update']) == [('A', '1'), ('B', '3')]
+    assert [env['name'] for env in report['add']] == ['D']
+    assert len(report['disable']) == 1
+    # C 不在 desired 中, prune 只删除 desired 中出现过的变量名
+    assert report['delete'] == []
+    assert len(_envs(ql)) == 4
+
+    ql.env_sync(desired, prune=True)
+    assert _envs(ql) == [('A', '1', 'note', 0), ('B', '2', '', 0), ('B', '3', '', 1),
+                         ('C', '1', '', 0), ('D', '1', '', 0)]
+
+    report = ql.env_sync(desired, prune=True)
+    assert report['unchanged'] == 4
+    assert not any(report[k] for k in ('add', 'update', 'delete', 'enable', 'disable'))
+
+
+def test_env_sync_prune_extra_values(ql):
+    for value in ('1', '2', '3'):
+        ql.env_add('A', value)
+    report = ql.env_sync([{'name': 'A', 'value': '2'}], prune=True)
+    assert report['unchanged'] == 1
+    assert len(report['delete']) == 2
+    assert _envs(ql) == [('A', '2', '', 0)]
@@ -0,0 +1,40 @@
+import pytest
+
+
+def _record_pages(ql, monkeypatch):
+    pages = []
+    get = ql._get
+
+    def recording_get(path, params_dict=None, **kwargs):
+        if params_dict and 'page' in params_dict:
+            pages.append(params_dict['page'])
+        return get(path, params_dict, **kwargs)
+
+    monkeypatch.setattr(ql, '_get', recording_get)
+    return pages
+
+
+@pytest.mark.parametrize('prefetch', [True, False])
+@pytest.mark.parametrize('count, expected_pages', [(0, [1]), (1, [1]), (5, [1]), (10, [1, 2]), (11, [1, 2, 3])])
+def test_iter_crons_page_boundaries(server, ql, monkeypatch, count, expected_pages, prefetch):
+    server.seed(crons=count)
+    pages = _record_pages(ql, monkeypatch)
+    names = [c['name'] for c in ql.iter_crons(page_size=5, prefetch=prefetch)]
+    assert names == [f'script_{i}' for i in range(count)]
+    assert pages == expected_pages
+
+
+def test_iter_envs_break_early(server, ql, monkeypatch):
+    server.seed(envs=20)
+    pages = _record_pages(ql, monkeypatch)
+    it = ql.iter_envs(page_size=5, prefetch=False)
+    assert [next(it)['value'] for _ in range(6)] == [f'value_{i}' for i in range(6)]
+    it.close()
+    assert pages == [1, 2]
+
+
+def test_iter_envs_without_pagination(ql, monkeypatch):
+    # 旧版青龙忽略分页参数, 直接返回列表
+    envs = [{'id': i, 'name': 'A', 'value': str(i)} for i in range(3)]
+    monkeypatch.setattr(ql, '_get', lambda path, params_dict=None, **kwargs: envs)
+    assert [e['value'] for e in ql.iter_envs(page_size=2)] == ['0', '1', '2']
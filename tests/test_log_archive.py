@@ -0,0 +1,44 @@
+import gzip
+import hashlib
+import json
+import os
+
+import pytest
+
+from qinglong_sdk import log_archive
+
+
+def test_sync_logs_rejects_paths_outside_dest_dir(server, ql, tmp_path):
+    dest = tmp_path / 'logs'
+    server.seed(crons=2, logs=2, log_lines=3)
+    server.state.logs['..'] = {'evil.log': 'x'}
+    server.state.logs['../..'] = {'evil.log': 'x'}
+    report = ql.logs_sync(str(dest))
+
+    assert sorted(report['failed']) == ['../../evil.log', '../evil.log']
+    assert len(report['downloaded']) == 4
+    assert not (tmp_path / 'evil.log').exists()
+    assert not os.path.exists(os.path.join(tmp_path.parent, 'evil.log'))
+
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_sync_logs_downloads_grown_log(server, ql, tmp_path, monkeypatch, compress):
+    monkeypatch.setattr(log_archive, 'CHUNK_SIZE', 7)
+    dest = tmp_path / 'logs'
+    server.seed(crons=2, logs=2, log_lines=3)
+    assert len(ql.logs_sync(str(dest), compress=compress)['downloaded']) == 4
+
+    files = server.state.logs['script_0.py']
+    filename = sorted(files)[-1]
+    files[filename] += '运行中 line 3\n'
+    report = ql.logs_sync(str(dest), compress=compress)
+    key = f'script_0.py/{filename}'
+    assert report['downloaded'] == [key]
+    assert report['skipped'] == 3
+
+    path = dest / 'script_0.py' / (filename + ('.gz' if compress else ''))
+    data = gzip.decompress(path.read_bytes()) if compress else path.read_bytes()
+    assert data.decode('utf-8') == files[filename]
+    manifest = json.loads((dest / log_archive.MANIFEST_NAME).read_text())
+    assert manifest[key]['sha1'] == hashlib.sha1(data).hexdigest()
+    assert not [f for f in os.listdir(path.parent) if f.startswith('.log-')]
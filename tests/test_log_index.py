@@ -0,0 +1,52 @@
+import sqlite3
+
+import pytest
+
+from qinglong_sdk import log_index
+from qinglong_sdk.log_index import LogIndex
+
+
+def _contentless_supported() -> bool:
+    conn = sqlite3.connect(':memory:')
+    try:
+        conn.execute(log_index._FTS)
+        return True
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        conn.close()
+
+
+@pytest.fixture(params=['contentless', 'fallback'])
+def index(request, tmp_path, monkeypatch):
+    if request.param == 'contentless' and not _contentless_supported():
+        pytest.skip(f"SQLite {sqlite3.sqlite_version} 不支持 contentless_delete")
+    if request.param == 'fallback':
+        monkeypatch.setattr(log_index, '_FTS', "CREATE VIRTUAL TABLE logs_fts USING no_such_module(content)")
+    with LogIndex(str(tmp_path / 'logs.db')) as index:
+        yield index
+
+
+def test_search_and_incremental_update(server, ql, index):
+    server.seed(crons=3, logs=2, log_lines=3)
+    crons = {c['name']: c for c in ql.crons_get_all()['data']}
+    report = index.update(ql)
+    assert report == {'indexed': 6, 'skipped': 0, 'failed': {}}
+
+    hits = index.search_logs('script_1')
+    assert {h['cron_id'] for h in hits} == {crons['script_1']['id']}
+    assert len(hits) == 2
+    assert hits[0]['created'] >= hits[1]['created']
+    assert index.search_logs('line', cron_ids=[crons['script_2']['id']], limit=1)[0]['directory'] == 'script_2.py'
+    assert index.search_logs('line', since=hits[0]['created'] + 1) == []
+
+    assert index.update(ql) == {'indexed': 0, 'skipped': 6, 'failed': {}}
+
+    # 修改日志后重新索引, 旧内容不再命中
+    files = server.state.logs['script_0.py']
+    filename = sorted(files)[0]
+    files[filename] = 'Traceback: connection reset\n'
+    assert index.update(ql)['indexed'] == 1
+    hits = index.search_logs('Traceback')
+    assert [(h['directory'], h['filename']) for h in hits] == [('script_0.py', filename)]
+    assert len(index.search_logs('script_0')) == 1
@@ -0,0 +1,28 @@
+import pytest
+
+from qinglong_sdk.models import Cron
+
+
+def test_cron_model():
+    data = {'id': 1, 'name': 'a', 'command': 'task a.js', 'schedule': '0 1 * * *', 'isPinned': 0}
+    cron = Cron(data)
+    assert cron.id == 1 and cron['name'] == 'a'
+    assert cron.isPinned == 0 and cron.get('isPinned') == 0
+    assert cron.labels is None
+    assert 'isPinned' in cron and 'missing' not in cron
+    assert cron.get('missing', 'x') == 'x'
+    with pytest.raises(AttributeError):
+        cron.missing
+    with pytest.raises(KeyError):
+        cron['missing']
+    assert {k: v for k, v in cron.to_dict().items() if v is not None} == data
+    assert cron == Cron(dict(data))
+
+
+def test_typed_client(server, make_ql):
+    server.seed(crons=2)
+    ql = make_ql(server, typed=True)
+    crons = ql.crons_get_all()
+    assert all(isinstance(cron, Cron) for cron in crons)
+    assert crons[0].name == 'script_0'
+    assert isinstance(ql.crons_get_all(raw=True)['data'][0], dict)
@@ -0,0 +1,102 @@
+import time
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+
+from qinglong_sdk.exceptions import QLCircuitOpenError, QLConnectionError
+from qinglong_sdk.metrics import Metrics
+from qinglong_sdk.policy import CircuitBreaker
+
+
+class BrokenAdapter(HTTPAdapter):
+    def send(self, request, **kwargs):
+        raise requests.exceptions.ChunkedEncodingError("Connection broken")
+
+
+class InterruptedAdapter(HTTPAdapter):
+    def send(self, request, **kwargs):
+        raise KeyboardInterrupt
+
+
+def _open(breaker):
+    breaker.record_failure()
+    breaker.opened_at -= breaker.reset_timeout
+    assert breaker.state == 'half-open'
+
+
+def test_circuit_breaker_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    assert breaker.before() is False
+    _open(breaker)
+    assert breaker.before() is True
+    with pytest.raises(QLCircuitOpenError):
+        breaker.before()
+    breaker.release()
+    assert breaker.before() is True
+    breaker.record_success()
+    assert breaker.state == 'closed'
+
+
+def test_half_open_probe_released_after_other_request_errors(server, make_ql):
+    server.seed(crons=3)
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    ql = make_ql(server, retry=3, circuit_breaker=breaker)
+    ql.login()
+    ql.session.mount('http://', BrokenAdapter())
+
+    with pytest.raises(QLConnectionError):
+        ql.crons_get_all()
+    assert breaker.state == 'open'
+    with pytest.raises(QLCircuitOpenError):
+        ql.crons_get_all()
+
+    time.sleep(0.06)
+    with pytest.raises(QLConnectionError):
+        ql.crons_get_all()
+    assert not breaker._probing
+
+    ql.session.mount('http://', HTTPAdapter())
+    time.sleep(0.06)
+    assert len(ql.crons_get_all()['data']) == 3
+    assert breaker.state == 'closed'
+
+
+def test_half_open_probe_released_after_keyboard_interrupt(server, make_ql):
+    server.seed(crons=3)
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    ql = make_ql(server, circuit_breaker=breaker)
+    ql.login()
+    _open(breaker)
+    ql.session.mount('http://', InterruptedAdapter())
+
+    with pytest.raises(KeyboardInterrupt):
+        ql.crons_get_all()
+    assert not breaker._probing
+    assert breaker.state == 'half-open'
+
+    ql.session.mount('http://', HTTPAdapter())
+    assert len(ql.crons_get_all()['data']) == 3
+    assert breaker.state == 'closed'
+
+
+def test_half_open_probe_released_after_metrics_hook_error(server, make_ql):
+    server.seed(crons=3)
+    failing = []
+
+    def on_request(method, endpoint, bytes_out):
+        if failing:
+            failing.pop()
+            raise RuntimeError("hook failed")
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    ql = make_ql(server, circuit_breaker=breaker, metrics=Metrics(on_request=on_request))
+    ql.login()
+    _open(breaker)
+    failing.append(True)
+
+    with pytest.raises(RuntimeError):
+        ql.crons_get_all()
+    assert not breaker._probing
+    assert len(ql.crons_get_all()['data']) == 3
+    assert breaker.state == 'closed'
@@ -0,0 +1,33 @@
+import asyncio
+import warnings
+
+import pytest
+
+pytest.importorskip('aiohttp')
+
+from qinglong_sdk.mock_server import CLIENT_ID, CLIENT_SECRET
+from qinglong_sdk.ql_async import AsyncQL
+
+
+@pytest.mark.server(latency=0.02)
+def test_reuse_across_event_loops(server):
+    server.seed(crons=5)
+    # 在事件循环外创建
+    ql = AsyncQL(server.url, CLIENT_ID, CLIENT_SECRET, max_concurrency=2)
+
+    async def job():
+        # 超过 max_concurrency 的并发请求, 信号量会绑定到当前事件循环
+        return await asyncio.gather(*[ql.crons_get_task_detail(i) for i in range(1, 6)])
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', ResourceWarning)
+        for _ in range(2):
+            details = asyncio.run(job())
+            assert [d['id'] for d in details] == [1, 2, 3, 4, 5]
+
+    async def close():
+        async with ql:
+            assert len((await ql.crons_get_all())['data']) == 5
+        assert ql.session is None
+
+    asyncio.run(close())
@@ -0,0 +1,51 @@
+import pytest
+
+from qinglong_sdk.exceptions import QLHTTPError
+from qinglong_sdk.response_cache import _MISSING, ResponseCache
+
+
+def test_write_invalidates_cached_resource(server, make_ql):
+    server.seed(crons=2, envs=2)
+    ql = make_ql(server, cache=True)
+    assert len(ql.crons_get_all()['data']) == 2
+    ql.env_get()
+    requests = server.requests
+    assert len(ql.crons_get_all()['data']) == 2
+    assert server.requests == requests
+
+    ql.crons_add('task new.py', '0 0 * * *', 'new')
+    requests = server.requests
+    assert len(ql.crons_get_all()['data']) == 3
+    assert server.requests == requests + 1
+
+    # 其他资源的缓存不受影响
+    requests = server.requests
+    ql.env_get()
+    assert server.requests == requests
+
+
+def test_failed_write_still_invalidates(server, make_ql):
+    server.seed(crons=2)
+    ql = make_ql(server, cache=True)
+    ql.crons_get_all()
+    with pytest.raises(QLHTTPError):
+        ql.crons_update(9999, 'task x.py', '0 0 * * *', 'x')
+    requests = server.requests
+    ql.crons_get_all()
+    assert server.requests == requests + 1
+
+
+def test_ttl_prefix_and_lru():
+    cache = ResponseCache({'/open/crons': 10, '/open/crons/1/log': 0}, maxsize=2)
+    assert cache.ttl_of('/open/crons/2') == 10
+    assert cache.ttl_of('/open/crons/1/log') == 0
+    assert cache.ttl_of('/open/envs') == 0
+
+    for i in range(3):
+        cache.set(cache.key(f'/open/crons/{i}'), i)
+    assert cache.stats()['size'] == 2
+    assert cache.get(cache.key('/open/crons/0')) is _MISSING
+    assert cache.get(cache.key('/open/crons/2')) == 2
+
+    cache.invalidate('/open/crons/5')
+    assert cache.stats()['size'] == 0
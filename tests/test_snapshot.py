@@ -0,0 +1,76 @@
+from qinglong_sdk.mock_server import MockQLServer
+from qinglong_sdk.ql_sdk import _data_list
+
+
+def _crons_by_command(ql):
+    return {cron['command']: cron for cron in _data_list(ql.crons_get_all(raw=True))}
+
+
+def test_export_import_round_trip(server, ql, make_ql, tmp_path):
+    path = str(tmp_path / 'panel.jsonl.gz')
+    server.seed(crons=3, envs=2)
+    a, b, c = sorted(_data_list(ql.crons_get_all(raw=True)), key=lambda cron: cron['id'])
+    # 真实面板上 task_before/task_after 是命令字符串
+    ql.crons_update(a['id'], a['command'], a['schedule'], a['name'], task_before='echo hi')
+    ql.crons_update(c['id'], c['command'], c['schedule'], c['name'], task_before=[a['id'], b['id']])
+    manifest = ql.export_snapshot(path)
+    assert manifest['counts']['crons'] == 3
+    assert manifest['counts']['envs'] == 2
+
+    with MockQLServer() as target:
+        # 先占用几个 id, 导入后的 id 与源面板不同
+        target.seed(envs=5)
+        ql = make_ql(target)
+        report = ql.import_snapshot(path)
+        assert report['failed'] == {}
+        assert report['crons'] == {'added': 3, 'existing': 0}
+        crons = _crons_by_command(ql)
+        assert crons[a['command']]['task_before'] == 'echo hi'
+        assert crons[c['command']]['task_before'] == [crons[a['command']]['id'], crons[b['command']]['id']]
+        assert crons[a['command']]['id'] != a['id']
+
+        # 再次导入时全部已存在
+        report = ql.import_snapshot(path)
+        assert report['failed'] == {}
+        assert report['crons'] == {'added': 0, 'existing': 3}
+
+
+def _add_sub(ql, url='https://example.com/repo.git'):
+    return ql.subs_add('public-repo', url, 'crontab', 'repo', schedule='0 0 * * *')['id']
+
+
+def test_import_remaps_sub_id_and_view_sorts(server, ql, make_ql, tmp_path):
+    path = str(tmp_path / 'panel.jsonl.gz')
+    server.seed(envs=3)
+    sub_id = _add_sub(ql)
+    ql.crons_add('task repo_a.js', '0 1 * * *', 'a', sub_id=sub_id)
+    sorts = [{'property': 'name', 'type': 'DESC'}]
+    ql.crons_add_view('by name', [['name', 'Reg', 'repo']], sorts=sorts)
+    ql.export_snapshot(path)
+
+    with MockQLServer() as target:
+        target.seed(envs=5)
+        ql = make_ql(target)
+        # 不恢复订阅, 面板上也没有同一订阅: sub_id 置空
+        report = ql.import_snapshot(path, resources=('crons',))
+        assert report['failed'] == {}
+        assert _crons_by_command(ql)['task repo_a.js']['sub_id'] is None
+
+    with MockQLServer() as target:
+        target.seed(envs=5)
+        ql = make_ql(target)
+        # 面板上已有同一订阅: 换成它的 id
+        existing = _add_sub(ql)
+        ql.import_snapshot(path, resources=('crons',))
+        assert _crons_by_command(ql)['task repo_a.js']['sub_id'] == existing
+
+    with MockQLServer() as target:
+        target.seed(envs=5)
+        ql = make_ql(target)
+        report = ql.import_snapshot(path)
+        assert report['failed'] == {}
+        new_sub = _data_list(ql.subs_get_all(raw=True))[0]['id']
+        assert new_sub != sub_id
+        assert _crons_by_command(ql)['task repo_a.js']['sub_id'] == new_sub
+        view, = _data_list(ql.crons_get_views(raw=True))
+        assert view['sorts'] == sorts
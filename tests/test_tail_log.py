@@ -0,0 +1,59 @@
+import time
+
+import pytest
+
+from qinglong_sdk.ql_sdk import CRON_STATUS_IDLE
+
+
+def _script(ql, monkeypatch, polls):
+    """
+    polls: [(status, log), ...], 每轮轮询依次返回
+    """
+    polls = iter(polls)
+    state = {}
+
+    def fake_get(path, params_dict=None, cached=True):
+        assert not cached
+        if path.endswith('/log'):
+            return state.pop('log')
+        state['status'], state['log'] = next(polls)
+        return {'status': state['status']}
+
+    monkeypatch.setattr(ql, '_get', fake_get)
+    monkeypatch.setattr(time, 'sleep', lambda seconds: None)
+
+
+def test_tail_log_resets_on_new_run(ql, monkeypatch):
+    _script(ql, monkeypatch, [
+        (0, "## run 1\na\n"),
+        (0, "## run 1\na\nb"),
+        (0, "## run 1\na\nb\n"),
+        # 新的一次运行, 日志比已读长度更长但内容不同
+        (0, "## run 2\nx\ny\nz\nlonger\n"),
+        # 日志被截断
+        (0, "## 3\n"),
+        (CRON_STATUS_IDLE, "## 3\nlast"),
+    ])
+    assert list(ql.crons_tail_log(1)) == [
+        "## run 1", "a", "b",
+        "## run 2", "x", "y", "z", "longer",
+        "## 3", "last",
+    ]
+
+
+def test_tail_log_same_length_new_run(ql, monkeypatch):
+    _script(ql, monkeypatch, [
+        (0, "## run 1\n"),
+        (CRON_STATUS_IDLE, "## run 2\n"),
+    ])
+    assert list(ql.crons_tail_log(1)) == ["## run 1", "## run 2"]
+
+
+@pytest.mark.server(run_time=0.3)
+def test_tail_log_until_idle(server, ql):
+    server.seed(crons=1)
+    _id = ql.crons_get_all()['data'][0]['id']
+    ql.crons_run(_id)
+    lines = list(ql.crons_tail_log(_id, min_interval=0.05, max_interval=0.1))
+    assert lines[0].startswith('## 开始执行')
+    assert lines[-1].startswith('## 执行结束')
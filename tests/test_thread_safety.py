@@ -0,0 +1,142 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from qinglong_sdk.singleflight import SingleFlight
+
+THREADS = 16
+
+
+def _run_together(func, n: int = THREADS) -> list:
+    """
+    n 个线程同时调用 func, 返回 [(返回值, 异常)]
+    """
+    barrier = threading.Barrier(n)
+
+    def call(i):
+        barrier.wait()
+        try:
+            return func(i), None
+        except Exception as e:
+            return None, e
+
+    with ThreadPoolExecutor(max_workers=n) as executor:
+        return list(executor.map(call, range(n)))
+
+
+def test_single_flight_runs_once():
+    flight = SingleFlight()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return object()
+
+    results = _run_together(lambda i: flight.do('key', slow))
+    assert len(calls) == 1
+    assert all(error is None for _, error in results)
+    assert len({id(rt) for rt, _ in results}) == 1
+
+
+def test_single_flight_waiters_see_leader_error():
+    flight = SingleFlight()
+    calls = []
+    error = ValueError('boom')
+
+    def fail():
+        calls.append(1)
+        time.sleep(0.2)
+        raise error
+
+    results = _run_together(lambda i: flight.do('key', fail))
+    assert len(calls) == 1
+    assert all(e is error for _, e in results)
+    # 失败后不会保留结果, 下一次调用重新执行
+    with pytest.raises(ValueError):
+        flight.do('key', fail)
+    assert len(calls) == 2
+
+
+@pytest.mark.server(latency=0.2)
+def test_concurrent_gets_send_one_request(server, ql):
+    server.seed(crons=10)
+    ql.login()
+    before = server.requests
+    results = _run_together(lambda i: ql.crons_get_all())
+    assert server.requests - before == 1
+    assert all(error is None and len(rt['data']) == 10 for rt, error in results)
+
+
+@pytest.mark.server(latency=0.05)
+def test_concurrent_401_logs_in_once(server, ql):
+    server.seed(crons=THREADS)
+    ql.login()
+    logins = []
+    login = ql.login
+
+    def counting_login():
+        logins.append(1)
+        return login()
+
+    ql.login = counting_login
+    # 服务端 token 失效, 所有线程都会收到 401
+    server.state.token = 'expired'
+    results = _run_together(lambda i: ql.crons_get_task_detail(i + 1))
+    assert len(logins) == 1
+    assert [error for _, error in results] == [None] * THREADS
+    assert [rt['id'] for rt, _ in results] == list(range(1, THREADS + 1))
+
+
+
+def _hold_first_get(ql):
+    """
+    第一次 GET /open/crons 拿到数据后等待 release 才返回, 返回 (已获取, release)
+    """
+    fetch = ql._fetch
+    fetched = threading.Event()
+    release = threading.Event()
+
+    def slow_first_get(method, api_path, *args, **kwargs):
+        rt = fetch(method, api_path, *args, **kwargs)
+        if method == 'GET' and api_path == '/open/crons' and not fetched.is_set():
+            fetched.set()
+            release.wait(5)
+        return rt
+
+    ql._fetch = slow_first_get
+    return fetched, release
+
+
+def test_get_after_write_does_not_join_earlier_get(server, ql):
+    server.seed(crons=3)
+    fetched, release = _hold_first_get(ql)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        before = executor.submit(ql.crons_get_all)
+        assert fetched.wait(5)
+        ql.crons_disable([1])
+        # 写之后发起的 GET 不能合并到之前的 GET 上, 否则会一直等到 release
+        timer = threading.Timer(2, release.set)
+        timer.start()
+        start = time.monotonic()
+        after = ql.crons_get_all()
+        assert time.monotonic() - start < 1
+        timer.cancel()
+        release.set()
+        assert before.result()['data'][0]['isDisabled'] == 0
+    assert after['data'][0]['isDisabled'] == 1
+
+
+def test_get_started_before_write_is_not_cached(server, make_ql):
+    server.seed(crons=3)
+    ql = make_ql(server, cache=True)
+    fetched, release = _hold_first_get(ql)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        before = executor.submit(ql.crons_get_all)
+        assert fetched.wait(5)
+        ql.crons_disable([1])
+        release.set()
+        assert before.result()['data'][0]['isDisabled'] == 0
+    assert ql.crons_get_all()['data'][0]['isDisabled'] == 1
@@ -0,0 +1,65 @@
+import os
+import threading
+import time
+
+from qinglong_sdk.token_cache import TokenCache
+
+
+def test_clients_share_cached_token(server, make_ql, tmp_path):
+    server.seed(crons=1)
+    path = str(tmp_path / 'tokens.json')
+    ql1 = make_ql(server, token_cache=path)
+    ql1.crons_get_all()
+    token = server.state.token
+
+    ql2 = make_ql(server, token_cache=path)
+    assert len(ql2.crons_get_all()['data']) == 1
+    # 第二个客户端直接使用缓存的 token, 没有重新登录
+    assert server.state.token == token
+    assert ql2.auth == ql1.auth
+
+
+def test_stale_shared_token_refreshed_on_401(server, make_ql, tmp_path):
+    server.seed(crons=1)
+    path = str(tmp_path / 'tokens.json')
+    ql1 = make_ql(server, token_cache=path)
+    ql2 = make_ql(server, token_cache=path)
+    ql1.crons_get_all()
+    ql2.crons_get_all()
+
+    ql1.login()
+    assert len(ql2.crons_get_all()['data']) == 1
+    assert ql2.auth == f"Bearer {server.state.token}"
+    assert TokenCache(path).get(ql2._token_key)[0] == ql2.auth
+
+
+def test_expired_token_ignored(tmp_path):
+    cache = TokenCache(str(tmp_path / 'tokens.json'), margin=60)
+    cache.set('a', 'Bearer a', time.time() + 30)
+    cache.set('b', 'Bearer b', time.time() + 3600)
+    assert cache.get('a') is None
+    assert cache.get('b')[0] == 'Bearer b'
+    cache.delete('b')
+    assert cache.get('b') is None
+
+
+def test_concurrent_set_keeps_all_keys(tmp_path):
+    path = str(tmp_path / 'tokens.json')
+    expiration = time.time() + 3600
+
+    def worker(i):
+        cache = TokenCache(path)
+        for j in range(20):
+            cache.set(f'{i}-{j}', f'Bearer {i}-{j}', expiration)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    cache = TokenCache(path)
+    assert all(cache.get(f'{i}-{j}') for i in range(8) for j in range(20))
+    # 原子替换不会留下临时文件
+    assert sorted(os.listdir(tmp_path)) == ['tokens.json', 'tokens.json.lock']
+    assert os.stat(path).st_mode & 0o777 == 0o600
@@ -0,0 +1,55 @@
+import time
+
+import pytest
+
+from qinglong_sdk.watch import Watcher, _fingerprint
+
+
+def _types(events):
+    return sorted((event.type, event.id) for event in events)
+
+
+@pytest.mark.server(run_time=0.05)
+def test_compact_snapshot_events(server, ql):
+    server.seed(crons=3, envs=2)
+    watcher = Watcher(ql, ['crons', 'envs'])
+    assert watcher.poll() == []
+    entry = watcher.snapshots['crons'][1]
+    assert len(entry[0]) == 16 and entry[3] is None
+
+    ql.crons_disable([1])
+    ql.crons_update(2, 'task new.py', '0 0 * * *', 'renamed')
+    ql.crons_delete(3)
+    ql.env_add('NEW', 'value')
+    events = watcher.poll()
+    assert _types(events) == [('added', 6), ('changed', 1), ('changed', 2), ('disabled', 1), ('removed', 3)]
+    changed = next(event for event in events if event.id == 2)
+    assert changed.item['name'] == 'renamed' and changed.old is None and changed.changes is None
+    assert watcher.poll() == []
+
+    ql.crons_run([1])
+    assert ('started', 1) in _types(watcher.poll())
+    time.sleep(0.1)
+    assert ('finished', 1) in _types(watcher.poll())
+
+
+def test_details_snapshot(server, ql):
+    server.seed(crons=2)
+    watcher = Watcher(ql, 'crons', details=True, ignore=('labels',))
+    watcher.poll()
+    ql.crons_update(1, 'task script_0.py', '1 1 * * *', 'script_0', labels=['other'])
+    ql.crons_add_labels([2], ['x'])
+    events = watcher.poll()
+    assert _types(events) == [('changed', 1)]
+    assert events[0].changes == {'schedule': ('0 0 * * *', '1 1 * * *')}
+    assert events[0].old['schedule'] == '0 0 * * *'
+
+    ql.crons_delete(2)
+    events = watcher.poll()
+    assert _types(events) == [('removed', 2)]
+    assert events[0].old['id'] == 2
+
+
+def test_fingerprint_is_stable():
+    assert _fingerprint({'a': 1, 'b': [1, 2]}) == _fingerprint({'b': [1, 2], 'a': 1})
+    assert _fingerprint({'a': 1, 't': 1}, ignore=('t',)) == _fingerprint({'a': 1, 't': 2}, ignore=('t',))